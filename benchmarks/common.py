@@ -0,0 +1,110 @@
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+RESULTS_DIR = PROJECT_ROOT / "benchmarks" / "results"
+
+
+# -----------------------------
+# Local stand-ins
+# -----------------------------
+# Point the API at fakeredis and SQLite instead of the Redis/Postgres
+# containers, and run Celery tasks eagerly with an in-memory result backend.
+# Must run before src.api.app is imported.
+def use_local_backends(workdir: Path):
+    import fakeredis
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    workdir.mkdir(parents=True, exist_ok=True)
+    db_path = workdir / "bench.db"
+    db_path.unlink(missing_ok=True)
+
+    import src.api.database as database
+    from src.api.connections import register_engine
+    database.engine = register_engine("sync", create_engine(f"sqlite:///{db_path}"))
+    database.SessionLocal = sessionmaker(bind=database.engine)
+    database.async_engine = register_engine("async", create_async_engine(f"sqlite+aiosqlite:///{db_path}"))
+    database.AsyncSessionLocal = async_sessionmaker(database.async_engine, expire_on_commit=False)
+    # The app creates tables in its lifespan hook; micro-benchmarks call handlers without it
+    from src.api.models import Base
+    Base.metadata.create_all(bind=database.engine)
+
+    server = fakeredis.FakeServer()
+    import src.api.cache as cache
+    import src.api.redis_client as redis_client
+    cache.redis_client = fakeredis.FakeAsyncRedis(server=server, decode_responses=True)
+    redis_client.redis_client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    # Celery runs eagerly on an in-memory broker: no queue to measure
+    import src.api.connections as connections
+    connections.broker_redis = None
+
+    from src.api.celery_worker import celery_app
+    celery_app.conf.update(
+        broker_url="memory://",
+        result_backend="cache+memory://",
+        task_always_eager=True,
+        task_store_eager_result=True
+    )
+
+
+# Request bodies for /v1/predict: a JSONL file (one feature dict per line) or,
+# by default, the rows of the model_features table
+def load_payloads(path=None, limit=None):
+    if path:
+        with open(path) as f:
+            payloads = [json.loads(line) for line in f if line.strip()]
+    else:
+        from src.api.scoring import FEATURE_COLUMNS
+        from src.storage import read_table
+        payloads = read_table("model_features", columns=FEATURE_COLUMNS).to_dict("records")
+    return payloads[:limit] if limit else payloads
+
+
+# -----------------------------
+# Results
+# -----------------------------
+def latency_summary(seconds):
+    ms = np.asarray(seconds) * 1000
+    if len(ms) == 0:
+        return {"count": 0}
+    return {
+        "count": int(len(ms)),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_ms": float(ms.max())
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+# Write benchmarks/results/<name>-<timestamp>.json (or output=) and return its path
+def save_results(name: str, params: dict, results: dict, output=None):
+    report = {
+        "benchmark": name,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": params,
+        "results": results
+    }
+    path = Path(output) if output else RESULTS_DIR / f"{name}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=2))
+    return path
@@ -0,0 +1,35 @@
+import argparse
+import json
+
+# Compare two result files of the same benchmark, metric by metric
+#   python -m benchmarks.compare benchmarks/results/micro-A.json benchmarks/results/micro-B.json
+
+
+def flatten(node, prefix=""):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from flatten(value, f"{prefix}.{key}" if prefix else key)
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        yield prefix, float(node)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare two benchmark result files")
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline["benchmark"] != candidate["benchmark"]:
+        raise SystemExit(f"Different benchmarks: {baseline['benchmark']} vs {candidate['benchmark']}")
+
+    print(f"{baseline['benchmark']}: {baseline['git_commit']} ({baseline['timestamp']}) -> {candidate['git_commit']} ({candidate['timestamp']})\n")
+    new = dict(flatten(candidate["results"]))
+    for metric, old in flatten(baseline["results"]):
+        if metric not in new:
+            continue
+        change = (new[metric] - old) / old * 100 if old else float("nan")
+        print(f"{metric:<48}{old:>14.4f}{new[metric]:>14.4f}{change:>+9.1f}%")
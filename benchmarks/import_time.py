@@ -0,0 +1,75 @@
+import argparse
+import os
+import subprocess
+import sys
+
+from benchmarks.common import PROJECT_ROOT, save_results
+
+# -----------------------------
+# Import-time budget
+# -----------------------------
+# Imports the API module in a fresh interpreter under `python -X importtime`
+# and fails (exit 1) when the import takes longer than the budget or pulls in
+# a module the API must not load at startup. Import-time work includes the
+# model load; nothing may connect to Postgres or Redis.
+#   python -m benchmarks.import_time [--module src.api.app] [--budget-ms 1000] [--repeat 5]
+FORBIDDEN = ["sklearn", "scipy", "pandas", "joblib", "celery", "matplotlib", "shap"]
+
+
+# One run: {module: (self_us, cumulative_us, depth)} from the -X importtime report
+def import_report(module):
+    env = {**os.environ, "PYTHONPATH": str(PROJECT_ROOT)}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    report = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        report[name.strip()] = (int(self_us), int(cumulative_us), depth)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the API's import time against a budget")
+    parser.add_argument("--module", default="src.api.app")
+    parser.add_argument("--budget-ms", type=float, default=1000.0)
+    parser.add_argument("--repeat", type=int, default=5, help="runs; the fastest one is checked")
+    parser.add_argument("--top", type=int, default=10, help="direct imports to list")
+    parser.add_argument("--output", default=None, help="also save the results JSON here")
+    args = parser.parse_args()
+
+    runs = [import_report(args.module) for _ in range(args.repeat)]
+    best = min(runs, key=lambda report: report[args.module][1])
+    total_ms = best[args.module][1] / 1000
+
+    print(f"{args.module}: {total_ms:.0f} ms (best of {args.repeat}, budget {args.budget_ms:.0f} ms)\n")
+    direct = sorted(
+        ((name, cumulative) for name, (_, cumulative, depth) in best.items() if depth == 1),
+        key=lambda item: -item[1]
+    )
+    for name, cumulative in direct[:args.top]:
+        print(f"   {name:<40}{cumulative / 1000:>9.1f} ms")
+
+    loaded = sorted({name.split(".")[0] for name in best} & set(FORBIDDEN))
+    if args.output:
+        save_results("import_time", vars(args), {
+            "total_ms": total_ms,
+            "direct_imports_ms": {name: cumulative / 1000 for name, cumulative in direct},
+            "forbidden_loaded": loaded
+        }, args.output)
+
+    failures = []
+    if total_ms > args.budget_ms:
+        failures.append(f"import took {total_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+    if loaded:
+        failures.append(f"imported at startup: {', '.join(loaded)}")
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures))
+        sys.exit(1)
+    print("\n✅ Within the import-time budget")
@@ -0,0 +1,115 @@
+import argparse
+import asyncio
+import contextlib
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from benchmarks.common import latency_summary, load_payloads, save_results, use_local_backends
+
+# -----------------------------
+# HTTP load generator
+# -----------------------------
+# Replays request bodies against /v1/predict and/or /v1/predict-async with
+# `concurrency` closed-loop clients and reports p50/p95/p99 and throughput.
+# Without --url the app is served in-process (ASGI transport) on
+# fakeredis/SQLite stand-ins, with Celery tasks executed eagerly.
+#   python -m benchmarks.load [--url http://localhost:8000] [--requests bodies.jsonl]
+#                             [--endpoint predict predict-async] [--concurrency 32] [--total 5000]
+ENDPOINTS = ["predict", "predict-async"]
+
+
+async def call_predict(client, body):
+    response = await client.post("/v1/predict", json=body)
+    return response.status_code == 200
+
+# Submit, then long-poll the result: end-to-end latency of an async prediction
+async def call_predict_async(client, body):
+    response = await client.post("/v1/predict-async", json=body)
+    if response.status_code != 200:
+        return False
+    task_id = response.json()["task_id"]
+    result = await client.get(f"/v1/predict-async/{task_id}", params={"wait": 30})
+    return result.status_code == 200 and result.json()["status"] == "SUCCESS"
+
+CALLS = {"predict": call_predict, "predict-async": call_predict_async}
+
+
+async def run_endpoint(client, endpoint, bodies, concurrency, total):
+    call = CALLS[endpoint]
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                ok = await call(client, bodies[i % len(bodies)])
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - start)
+            errors += not ok
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        **latency_summary(latencies),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "throughput_rps": total / elapsed
+    }
+
+
+async def run(args):
+    bodies = load_payloads(args.requests)
+    if args.unique:
+        # Perturb one feature per request so nothing is served from the cache
+        bodies = [
+            {**bodies[i % len(bodies)], "avg_payment_delay": bodies[i % len(bodies)]["avg_payment_delay"] + i * 1e-6}
+            for i in range(args.total)
+        ]
+
+    async with contextlib.AsyncExitStack() as stack:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=60)
+        else:
+            use_local_backends(Path(tempfile.mkdtemp(prefix="bench-load-")))
+            from src.api.app import app
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", timeout=60)
+        await stack.enter_async_context(client)
+
+        results = {}
+        for endpoint in args.endpoint:
+            # Short warm-up so connection setup and first-call costs stay out of the numbers
+            await run_endpoint(client, endpoint, bodies, args.concurrency, min(args.warmup, args.total))
+            results[endpoint] = await run_endpoint(client, endpoint, bodies, args.concurrency, args.total)
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP load test for the prediction endpoints")
+    parser.add_argument("--url", default=None, help="live API base URL (default: in-process app on local stand-ins)")
+    parser.add_argument("--requests", default=None, help="JSONL of request bodies to replay (default: model_features rows)")
+    parser.add_argument("--endpoint", nargs="+", choices=ENDPOINTS, default=["predict"])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--total", type=int, default=5000, help="requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=200)
+    parser.add_argument("--unique", action="store_true", help="make every body unique to defeat the cache")
+    parser.add_argument("--output", default=None, help="results JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    path = save_results("load", vars(args), results, args.output)
+
+    for endpoint, summary in results.items():
+        print(
+            f"{endpoint:<14} {summary['throughput_rps']:>9.1f} req/s   "
+            f"p50 {summary['p50_ms']:.2f}ms   p95 {summary['p95_ms']:.2f}ms   p99 {summary['p99_ms']:.2f}ms   "
+            f"errors {summary['errors']}"
+        )
+    print(f"\n✅ Results saved to {path}")
@@ -0,0 +1,100 @@
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pandas as pd
+
+from benchmarks.common import latency_summary, load_payloads, save_results, use_local_backends
+
+# -----------------------------
+# Micro-benchmarks
+# -----------------------------
+# Per-call latency of the hot-path building blocks and of the predict_risk
+# handler itself (called directly, no HTTP), with fakeredis/SQLite stand-ins.
+#   python -m benchmarks.micro [--iterations 20000] [--output results.json]
+
+
+def time_calls(fn, args_list, repeat=1):
+    samples = []
+    for _ in range(repeat):
+        for args in args_list:
+            start = time.perf_counter()
+            fn(*args)
+            samples.append(time.perf_counter() - start)
+    return latency_summary(samples)
+
+async def time_async_calls(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        await fn(*args)
+        samples.append(time.perf_counter() - start)
+    return latency_summary(samples)
+
+
+def run(iterations: int):
+    use_local_backends(Path(tempfile.mkdtemp(prefix="bench-micro-")))
+    from src.api import app as api
+    from src.api.cache import generate_key, local_key, local_cache
+    from src.api.scoring import FEATURE_COLUMNS, to_matrix
+
+    payloads = load_payloads()
+    rows = [payloads[i % len(payloads)] for i in range(iterations)]
+    current = api.registry.current
+    version = current.version
+    results = {}
+
+    # Cache keys
+    results["generate_key"] = time_calls(generate_key, [(row, version) for row in rows])
+    results["local_key"] = time_calls(local_key, [(row, version) for row in rows])
+
+    # Model call: sklearn DataFrame path (the original handler) vs the compiled scorer
+    frames = [(pd.DataFrame([row])[FEATURE_COLUMNS],) for row in rows[:min(iterations, 2000)]]
+    results["sklearn_predict_proba"] = time_calls(current.model.predict_proba, frames)
+    results["scorer_predict_one"] = time_calls(current.scorer.predict_one, [(row,) for row in rows])
+    batch = to_matrix(rows[:256])
+    results["scorer_predict_many_256"] = time_calls(current.scorer.predict_many, [(batch,)] * 1000)
+    if current.explainer is not None:
+        results["explainer_explain_many_1"] = time_calls(
+            current.explainer.explain_many, [(to_matrix([row]),) for row in rows]
+        )
+
+    # predict_risk handler: cache-miss path (unique features) and cache-hit path
+    async def handler_benchmarks():
+        api.log_writer.start()
+        request = SimpleNamespace(state=SimpleNamespace(start_time=0.0))
+
+        def call(features):
+            request.state.start_time = time.perf_counter()
+            return api.predict_risk(features, request)
+
+        local_cache._data.clear()
+        misses = []
+        for i, row in enumerate(rows):
+            # perturb one feature so every call misses both cache tiers
+            misses.append((api.UserFeatures(**{**row, "avg_payment_delay": row["avg_payment_delay"] + i * 1e-6}),))
+        out = {"predict_risk_miss": await time_async_calls(call, misses)}
+        out["predict_risk_hit"] = await time_async_calls(call, misses)
+        await api.log_writer.stop()
+        return out
+
+    results.update(asyncio.run(handler_benchmarks()))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for the scoring hot path")
+    parser.add_argument("--iterations", type=int, default=20000)
+    parser.add_argument("--output", default=None, help="results JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    results = run(args.iterations)
+    path = save_results("micro", vars(args), results, args.output)
+
+    print(f"{'benchmark':<28}{'p50 µs':>10}{'p95 µs':>10}{'p99 µs':>10}")
+    for name, summary in results.items():
+        print(f"{name:<28}{summary['p50_ms'] * 1000:>10.1f}{summary['p95_ms'] * 1000:>10.1f}{summary['p99_ms'] * 1000:>10.1f}")
+    print(f"\n✅ Results saved to {path}")
@@ -0,0 +1,92 @@
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.common import PROJECT_ROOT, save_results
+
+# -----------------------------
+# Pipeline benchmarks
+# -----------------------------
+# Generates synthetic data at several scales into a scratch data tree
+# (CREDIT_RISK_DATA_DIR) and times feature engineering on each. Every step runs
+# in its own process so wall time and peak RSS are measured per step.
+#   python -m benchmarks.pipeline [--scales 2000x3000 20000x30000] [--repeat 3]
+DEFAULT_SCALES = ["2000x3000", "20000x30000", "200000x300000"]
+
+
+# Run `python -m module args...`; returns (seconds, peak RSS in MB).
+# stderr goes to a temp file, not a pipe: nothing reads a pipe during wait4,
+# so a chatty child would block on a full pipe buffer forever.
+def run_step(module, args, data_dir):
+    env = {**os.environ, "CREDIT_RISK_DATA_DIR": str(data_dir), "PYTHONPATH": str(PROJECT_ROOT)}
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            [sys.executable, "-m", module, *args], cwd=PROJECT_ROOT, env=env,
+            stdout=subprocess.DEVNULL, stderr=stderr
+        )
+        _, status, usage = os.wait4(proc.pid, 0)
+        elapsed = time.perf_counter() - start
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        if proc.returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"{module} failed: {stderr.read().decode(errors='replace')[-2000:]}")
+    return elapsed, usage.ru_maxrss / 1024  # ru_maxrss is in KB on Linux
+
+
+def bench_scale(scale, repeat, workers, keep):
+    users, cards = (int(n) for n in scale.split("x"))
+    data_dir = Path(tempfile.mkdtemp(prefix=f"bench-pipeline-{scale}-"))
+    try:
+        generate, generate_rss = run_step("src.data_generation.generate_synthetic_data", [
+            "--users", str(users), "--cards", str(cards), "--workers", str(workers),
+            "--as-of", "2026-01-01", "--no-csv"
+        ], data_dir)
+        demographics, _ = run_step("src.data_generation.generate_demographics", ["--no-csv"], data_dir)
+
+        runs = [run_step("src.modeling.feature_engineering", [], data_dir) for _ in range(repeat)]
+        seconds = np.array([r[0] for r in runs])
+        import pyarrow.parquet as pq
+        payments = pq.ParquetFile(data_dir / "raw" / "payments.parquet").metadata.num_rows
+        return {
+            "users": users,
+            "cards": cards,
+            "payments": payments,
+            "generate_s": generate,
+            "generate_peak_rss_mb": generate_rss,
+            "demographics_s": demographics,
+            "feature_engineering_s": {"min": float(seconds.min()), "median": float(np.median(seconds)), "runs": seconds.tolist()},
+            "feature_engineering_peak_rss_mb": max(r[1] for r in runs),
+            "payments_per_s": payments / float(np.median(seconds))
+        }
+    finally:
+        if not keep:
+            shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Feature engineering at several synthetic data scales")
+    parser.add_argument("--scales", nargs="+", default=DEFAULT_SCALES, help="USERSxCARDS per scale")
+    parser.add_argument("--repeat", type=int, default=3, help="feature engineering runs per scale")
+    parser.add_argument("--workers", type=int, default=1, help="data generator processes")
+    parser.add_argument("--keep", action="store_true", help="keep the generated data trees")
+    parser.add_argument("--output", default=None, help="results JSON path (default: benchmarks/results/)")
+    args = parser.parse_args()
+
+    results = {}
+    for scale in args.scales:
+        results[scale] = bench_scale(scale, args.repeat, args.workers, args.keep)
+        r = results[scale]
+        print(
+            f"{scale:<16} {r['payments']:>10} payments   generate {r['generate_s']:.2f}s   "
+            f"features {r['feature_engineering_s']['median']:.2f}s ({r['feature_engineering_peak_rss_mb']:.0f} MB)"
+        )
+    path = save_results("pipeline", vars(args), results, args.output)
+    print(f"\n✅ Results saved to {path}")
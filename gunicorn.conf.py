@@ -0,0 +1,45 @@
+import os
+
+from src.api.workers import freeze_heap, prepare_multiproc_dir, worker_count
+
+# -----------------------------
+# Production serving
+# -----------------------------
+#   python -m gunicorn -c gunicorn.conf.py src.api.app:app
+# The app (and with it the model and scorer arrays) is imported once in the
+# master and shared copy-on-write by the forked uvicorn workers. Each worker
+# resets the DB/Redis pools it inherited (see src/api/connections.py) and runs
+# its own event loop, log writer and model watcher.
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = worker_count("WEB_CONCURRENCY")
+worker_class = "uvicorn_worker.UvicornWorker"
+preload_app = True
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
+# Access logging comes from the app's sampled JSON middleware
+accesslog = None
+
+# Before the app import below pulls in prometheus_client
+prepare_multiproc_dir()
+
+
+# Master, after the preload and before the first fork: create the schema and
+# the upcoming prediction_logs partitions once (not in every worker's startup
+# hook at the same time), then freeze the heap
+def when_ready(server):
+    from src.api import app as api
+    if api.CREATE_SCHEMA:
+        from src.analysis.log_retention import ensure_partitions
+        from src.api.database import engine
+        from src.api.models import Base
+        Base.metadata.create_all(bind=engine)
+        ensure_partitions()
+        engine.dispose()
+        api.CREATE_SCHEMA = False
+    freeze_heap()
+    server.log.info(f"Model {api.registry.current.version} preloaded, forking {server.num_workers} workers")
+
+def child_exit(server, worker):
+    from src.api.telemetry import mark_process_dead
+    mark_process_dead(worker.pid)
@@ -1,16 +1,9 @@
-import pandas as pd
-from pathlib import Path
-
-# -----------------------------
-# Paths
-# -----------------------------
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DATA_RAW = PROJECT_ROOT / "data" / "raw"
+from src.storage import read_table
 
 # -----------------------------
 # Load Data
 # -----------------------------
-demographics = pd.read_csv(DATA_RAW / "demographics.csv")
+demographics = read_table("demographics")
 
 # Make sure default_flag exists
 if "default_flag" not in demographics.columns:
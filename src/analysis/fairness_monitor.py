@@ -0,0 +1,204 @@
+import argparse
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import select, tuple_
+
+from src.api.database import SessionLocal, engine
+from src.api.models import Base, PredictionLog, FairnessStat, Watermark
+from src.api.prediction_logger import MAX_FLUSH_DELAY
+
+# -----------------------------
+# Fairness monitoring over production predictions
+# -----------------------------
+# prediction_logs is read incrementally: each run resumes after the last
+# (created_at, id) it consumed and walks forward in keyset order on the
+# (created_at, id) index, so a run touches only new rows. Rows are folded into
+# hourly per-group totals (fairness_stats), and metrics for any window are
+# computed from those totals, never from the log table.
+WATERMARK = "fairness_monitor"
+BATCH_SIZE = 50000
+# Rows this young may still be in another API process's write-behind buffer
+# (created_at is set before the flush), so they wait for the next run.
+# Limit: a row committed later than this (backpressure, a database outage;
+# prediction_log_rows_total{result="late"}) is behind the watermark and never
+# counted. The writer drops rows on a failed flush instead of retrying.
+SETTLE = timedelta(seconds=MAX_FLUSH_DELAY)
+# A prediction counts as approved when it lands in the lowest risk bucket
+APPROVED = "Low Risk"
+
+LOG_COLUMNS = [
+    PredictionLog.id, PredictionLog.created_at, PredictionLog.model_version,
+    PredictionLog.default_probability, PredictionLog.risk_category,
+    PredictionLog.income_low, PredictionLog.income_medium,
+    PredictionLog.age_18_25, PredictionLog.age_26_35, PredictionLog.age_36_50
+]
+
+
+# Recover the groups from the one-hot columns the model sees
+def group_columns(logs):
+    return {
+        "income_band": np.select(
+            [logs["income_low"] == 1, logs["income_medium"] == 1], ["low", "medium"], default="high"
+        ),
+        "age_group": np.select(
+            [logs["age_18_25"] == 1, logs["age_26_35"] == 1, logs["age_36_50"] == 1],
+            ["18-25", "26-35", "36-50"], default="51+"
+        )
+    }
+
+def fetch_batch(session, after, until, batch_size=BATCH_SIZE):
+    query = (
+        select(*LOG_COLUMNS)
+        .where(PredictionLog.created_at < until)
+        .order_by(PredictionLog.created_at, PredictionLog.id)
+        .limit(batch_size)
+    )
+    if after is not None:
+        query = query.where(tuple_(PredictionLog.created_at, PredictionLog.id) > tuple_(*after))
+    return pd.DataFrame(session.execute(query).all(), columns=[c.key for c in LOG_COLUMNS])
+
+# Per (hour, model version, dimension, group) counts and probability sums for one batch
+def aggregate(logs):
+    base = pd.DataFrame({
+        "window_start": pd.to_datetime(logs["created_at"]).dt.floor("h"),
+        "model_version": logs["model_version"].fillna(""),
+        "probability": logs["default_probability"].astype(float),
+        "approved": (logs["risk_category"] == APPROVED).astype(int)
+    })
+    frames = []
+    for dimension, groups in group_columns(logs).items():
+        frames.append(
+            base.assign(dimension=dimension, group_value=groups)
+            .groupby(["window_start", "model_version", "dimension", "group_value"], as_index=False)
+            .agg(predictions=("probability", "size"), probability_sum=("probability", "sum"), approvals=("approved", "sum"))
+        )
+    return pd.concat(frames, ignore_index=True)
+
+# Add batch totals onto the stored rows (only the windows this batch touched are loaded)
+def merge_stats(session, totals):
+    existing = session.scalars(
+        select(FairnessStat).where(
+            FairnessStat.window_start.in_(totals["window_start"].dt.to_pydatetime().tolist()),
+            FairnessStat.model_version.in_(totals["model_version"].unique().tolist())
+        )
+    ).all()
+    stats = {(s.window_start, s.model_version, s.dimension, s.group_value): s for s in existing}
+    for row in totals.itertuples(index=False):
+        window_start = row.window_start.to_pydatetime()
+        key = (window_start, row.model_version, row.dimension, row.group_value)
+        stat = stats.get(key)
+        if stat is None:
+            stat = stats[key] = FairnessStat(
+                window_start=window_start, model_version=row.model_version,
+                dimension=row.dimension, group_value=row.group_value,
+                predictions=0, probability_sum=0.0, approvals=0
+            )
+            session.add(stat)
+        stat.predictions += int(row.predictions)
+        stat.probability_sum += float(row.probability_sum)
+        stat.approvals += int(row.approvals)
+
+
+# -----------------------------
+# Incremental update
+# -----------------------------
+# Consume every settled row past the watermark. Each batch commits its stats
+# together with the advanced watermark, so a crash never double counts, and the
+# watermark row is locked so overlapping runs serialize instead of racing.
+def update_fairness_stats(session_factory=SessionLocal, batch_size=BATCH_SIZE, settle=SETTLE):
+    until = datetime.utcnow() - settle
+    processed = 0
+    while True:
+        with session_factory() as session:
+            watermark = session.get(Watermark, WATERMARK, with_for_update=True) or Watermark(name=WATERMARK)
+            after = (watermark.created_at, watermark.log_id) if watermark.created_at else None
+            logs = fetch_batch(session, after, until, batch_size)
+            if logs.empty:
+                return processed
+
+            merge_stats(session, aggregate(logs))
+            last = logs.iloc[-1]
+            watermark.created_at, watermark.log_id = pd.Timestamp(last["created_at"]).to_pydatetime(), last["id"]
+            session.add(watermark)
+            session.commit()
+        processed += len(logs)
+        if len(logs) < batch_size:
+            return processed
+
+
+# -----------------------------
+# Metrics per window
+# -----------------------------
+# Observed default rates per group from the labelled data. Production logs
+# carry no outcomes, so calibration compares predictions with these.
+def reference_default_rates():
+    from src.storage import read_table
+    try:
+        demographics = read_table("demographics", columns=["income_band", "age_group", "default_flag"])
+    except FileNotFoundError:
+        return {}
+    rates = {}
+    for dimension in ["income_band", "age_group"]:
+        for group, rate in demographics.groupby(dimension, observed=True)["default_flag"].mean().items():
+            rates[(dimension, str(group))] = float(rate)
+    return rates
+
+def fairness_report(session_factory=SessionLocal, since=None, until=None, window_hours=24, model_version=None):
+    query = select(FairnessStat)
+    if since is not None:
+        query = query.where(FairnessStat.window_start >= since)
+    if until is not None:
+        query = query.where(FairnessStat.window_start < until)
+    if model_version is not None:
+        query = query.where(FairnessStat.model_version == model_version)
+    with session_factory() as session:
+        stats = pd.DataFrame([
+            (s.window_start, s.dimension, s.group_value, s.predictions, s.probability_sum, s.approvals)
+            for s in session.scalars(query)
+        ], columns=["window_start", "dimension", "group_value", "predictions", "probability_sum", "approvals"])
+    if stats.empty:
+        return stats
+
+    stats["window"] = pd.to_datetime(stats["window_start"]).dt.floor(f"{window_hours}h")
+    report = (
+        stats.groupby(["window", "dimension", "group_value"], as_index=False)
+        [["predictions", "probability_sum", "approvals"]].sum()
+    )
+    report["mean_probability"] = report["probability_sum"] / report["predictions"]
+    report["approval_rate"] = report["approvals"] / report["predictions"]
+    # Disparate impact: approval rate relative to the best-treated group (four-fifths rule flags < 0.8)
+    best = report.groupby(["window", "dimension"])["approval_rate"].transform("max")
+    report["approval_ratio"] = np.where(best > 0, report["approval_rate"] / best, np.nan)
+
+    rates = reference_default_rates()
+    report["reference_default_rate"] = [rates.get(key, np.nan) for key in zip(report["dimension"], report["group_value"])]
+    report["calibration_gap"] = report["mean_probability"] - report["reference_default_rate"]
+    return report.drop(columns=["probability_sum"])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fold new prediction logs into fairness stats and print per-window metrics")
+    parser.add_argument("--report-only", action="store_true", help="skip the incremental update")
+    parser.add_argument("--days", type=float, default=7, help="report on this many past days")
+    parser.add_argument("--window-hours", type=int, default=24, help="report window size")
+    parser.add_argument("--model-version", default=None)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    if not args.report_only:
+        print(f"✅ Processed {update_fairness_stats()} new prediction logs")
+
+    report = fairness_report(
+        since=datetime.utcnow() - timedelta(days=args.days),
+        window_hours=args.window_hours,
+        model_version=args.model_version
+    )
+    if report.empty:
+        print("No prediction stats in this period yet.")
+    else:
+        with pd.option_context("display.width", 200, "display.max_columns", None):
+            for dimension, rows in report.groupby("dimension"):
+                print(f"\n===== {dimension.upper()} =====")
+                print(rows.drop(columns="dimension").to_string(index=False))
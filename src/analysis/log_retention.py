@@ -0,0 +1,275 @@
+import argparse
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import case, delete, func, insert, literal_column, select, text
+
+from src.api.database import SessionLocal, engine
+from src.api.models import Base, PredictionLog, PredictionRollup, Watermark
+from src.storage import DATA_DIR, TableWriter
+
+# -----------------------------
+# prediction_logs partitions, rollups and retention
+# -----------------------------
+# On Postgres prediction_logs is partitioned by day (prediction_logs_pYYYYMMDD)
+# with a DEFAULT partition as a safety net. An hourly maintenance run:
+#   1. creates the partitions for the next PARTITION_DAYS_AHEAD days,
+#   2. rolls every finished day up into prediction_rollups (count and
+#      probability sum per model version / risk category / probability decile),
+#   3. archives days older than RETENTION_DAYS to Parquet and drops them
+#      (a partition drop, not a DELETE).
+# Dashboards read prediction_rollups, which is kept forever and stays small.
+# On other databases (SQLite in benchmarks) steps 2-3 run with plain DELETEs.
+WATERMARK = "prediction_rollups"
+PARTITION_DAYS_AHEAD = 7
+RETENTION_DAYS = 90
+# A day is rolled up once it ended this long ago (write-behind buffers have flushed)
+ROLLUP_DELAY = timedelta(hours=1)
+ARCHIVE_DIR = DATA_DIR / "archive" / "prediction_logs"
+ARCHIVE_BATCH_SIZE = 100000
+
+LOG_COLUMNS = [column.name for column in PredictionLog.__table__.columns]
+
+
+def partition_name(day: date):
+    return f"prediction_logs_p{day:%Y%m%d}"
+
+def is_postgres(session):
+    return session.get_bind().dialect.name == "postgresql"
+
+def existing_partitions(session):
+    rows = session.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'prediction_logs'"
+    )).scalars()
+    return {datetime.strptime(name[-8:], "%Y%m%d").date(): name for name in rows if name != "prediction_logs_default"}
+
+
+# -----------------------------
+# Partition management
+# -----------------------------
+# New partitions are created detached, filled with any rows of that day that
+# already fell into the DEFAULT partition, then attached, so a late run never
+# fails on (or loses) rows that arrived before their partition existed.
+# DEFAULT stays locked from the move until commit: a row for that day
+# inserted in between would otherwise stay behind and fail the ATTACH. The
+# parent is locked first (EXCLUSIVE: reads go on, inserts wait) because an
+# insert picks its partition before waiting on DEFAULT's lock and would then
+# fail the new partition constraint. Same lock order as an INSERT.
+def create_partition(session, day: date):
+    name = partition_name(day)
+    bounds = {"start": datetime.combine(day, datetime.min.time()), "end": datetime.combine(day + timedelta(days=1), datetime.min.time())}
+    session.execute(text(f"CREATE TABLE {name} (LIKE prediction_logs INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    session.execute(text("LOCK TABLE prediction_logs IN EXCLUSIVE MODE"))
+    session.execute(text("LOCK TABLE prediction_logs_default IN ACCESS EXCLUSIVE MODE"))
+    session.execute(text(
+        f"WITH moved AS (DELETE FROM prediction_logs_default WHERE created_at >= :start AND created_at < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), bounds)
+    session.execute(text(
+        f"ALTER TABLE prediction_logs ATTACH PARTITION {name} FOR VALUES FROM ('{bounds['start']}') TO ('{bounds['end']}')"
+    ))
+
+def ensure_partitions(session_factory=SessionLocal, start=None, days_ahead=PARTITION_DAYS_AHEAD):
+    created = []
+    with session_factory() as session:
+        if not is_postgres(session):
+            return created
+        existing = existing_partitions(session)
+        day = start or datetime.utcnow().date()
+        while day <= datetime.utcnow().date() + timedelta(days=days_ahead):
+            if day not in existing:
+                create_partition(session, day)
+                session.commit()
+                created.append(day)
+            day += timedelta(days=1)
+    return created
+
+
+# One-off conversion of a pre-partitioning (plain) prediction_logs table
+def migrate_to_partitioned(session_factory=SessionLocal):
+    with session_factory() as session:
+        relkind = session.execute(text("SELECT relkind FROM pg_class WHERE relname = 'prediction_logs'")).scalar()
+        if relkind != "r":
+            return False
+        session.execute(text("ALTER TABLE prediction_logs RENAME TO prediction_logs_unpartitioned"))
+        session.execute(text("ALTER TABLE prediction_logs_unpartitioned RENAME CONSTRAINT prediction_logs_pkey TO prediction_logs_unpartitioned_pkey"))
+        session.execute(text("DROP INDEX IF EXISTS ix_prediction_logs_created_at_id"))
+        session.execute(text("UPDATE prediction_logs_unpartitioned SET created_at = now() AT TIME ZONE 'utc' WHERE created_at IS NULL"))
+        oldest = session.execute(text("SELECT min(created_at) FROM prediction_logs_unpartitioned")).scalar()
+        Base.metadata.create_all(bind=session.connection(), tables=[PredictionLog.__table__])
+        session.commit()
+
+    ensure_partitions(session_factory, start=oldest.date() if oldest else None)
+    columns = ", ".join(LOG_COLUMNS)
+    with session_factory() as session:
+        session.execute(text(f"INSERT INTO prediction_logs ({columns}) SELECT {columns} FROM prediction_logs_unpartitioned"))
+        session.execute(text("DROP TABLE prediction_logs_unpartitioned"))
+        session.commit()
+    return True
+
+
+# -----------------------------
+# Daily rollups
+# -----------------------------
+# Probability deciles (0..9) as a CASE so the query runs unchanged on any
+# database; literal constants keep SELECT and GROUP BY textually identical
+PROBABILITY_BUCKET = case(
+    *[(PredictionLog.default_probability < literal_column(f"{(i + 1) / 10}"), literal_column(str(i))) for i in range(9)],
+    else_=literal_column("9")
+)
+
+def day_bounds(day: date):
+    start = datetime.combine(day, datetime.min.time())
+    return start, start + timedelta(days=1)
+
+def rollup_day(session, day: date):
+    start, end = day_bounds(day)
+    bucket = PROBABILITY_BUCKET.label("bucket")
+    totals = session.execute(
+        select(
+            func.coalesce(PredictionLog.model_version, ""), func.coalesce(PredictionLog.risk_category, ""),
+            bucket, func.count(), func.sum(PredictionLog.default_probability)
+        )
+        .where(PredictionLog.created_at >= start, PredictionLog.created_at < end)
+        .group_by(PredictionLog.model_version, PredictionLog.risk_category, bucket)
+    ).all()
+    # Idempotent: a re-run replaces the day
+    session.execute(delete(PredictionRollup).where(PredictionRollup.day == day))
+    if totals:
+        session.execute(insert(PredictionRollup), [
+            {
+                "day": day, "model_version": version, "risk_category": category,
+                "probability_bucket": int(bucket), "predictions": int(count), "probability_sum": float(total or 0.0)
+            }
+            for version, category, bucket, count, total in totals
+        ])
+    return sum(row[3] for row in totals)
+
+# Roll up every finished day after the watermark, one commit per day
+# (re-rolling a day replaces it, so an overlapping run is harmless)
+def update_rollups(session_factory=SessionLocal, delay=ROLLUP_DELAY):
+    last_day = (datetime.utcnow() - delay).date() - timedelta(days=1)
+    rolled = []
+    with session_factory() as session:
+        watermark = session.get(Watermark, WATERMARK, with_for_update=True) or Watermark(name=WATERMARK)
+        if watermark.created_at is not None:
+            day = watermark.created_at.date() + timedelta(days=1)
+        else:
+            oldest = session.scalar(select(func.min(PredictionLog.created_at)))
+            if oldest is None:
+                return rolled
+            day = oldest.date()
+        while day <= last_day:
+            rows = rollup_day(session, day)
+            watermark.created_at = datetime.combine(day, datetime.min.time())
+            session.add(watermark)
+            session.commit()
+            rolled.append((day, rows))
+            day += timedelta(days=1)
+    return rolled
+
+
+# -----------------------------
+# Retention
+# -----------------------------
+# Stream one day of raw logs to ARCHIVE_DIR/YYYY-MM-DD.parquet
+def archive_day(session, day: date, archive_dir=ARCHIVE_DIR):
+    start, end = day_bounds(day)
+    path = archive_dir / f"{day:%Y-%m-%d}.parquet"
+    query = (
+        select(PredictionLog.__table__)
+        .where(PredictionLog.created_at >= start, PredictionLog.created_at < end)
+        .order_by(PredictionLog.created_at)
+    )
+    result = session.execute(query.execution_options(yield_per=ARCHIVE_BATCH_SIZE))
+    rows = 0
+    with TableWriter("prediction_logs", path=path) as out:
+        for batch in result.partitions():
+            frame = pd.DataFrame(batch, columns=LOG_COLUMNS)
+            frame["id"] = frame["id"].astype(str)
+            out.write(frame)
+        rows = out.rows
+    if rows == 0:
+        path.unlink(missing_ok=True)
+    return rows
+
+# Archive (optionally) and remove raw logs older than retention_days. Only days
+# already rolled up are removed, so the rollups never lose history.
+def apply_retention(session_factory=SessionLocal, retention_days=RETENTION_DAYS, archive=True, archive_dir=ARCHIVE_DIR):
+    cutoff = datetime.utcnow().date() - timedelta(days=retention_days)
+    removed = []
+    with session_factory() as session:
+        watermark = session.get(Watermark, WATERMARK)
+        if watermark is None or watermark.created_at is None:
+            return removed
+        cutoff = min(cutoff, watermark.created_at.date() + timedelta(days=1))
+        oldest = session.scalar(select(func.min(PredictionLog.created_at)))
+        partitions = existing_partitions(session) if is_postgres(session) else {}
+        days = sorted({d for d in partitions if d < cutoff} | (
+            {oldest.date() + timedelta(days=i) for i in range((cutoff - oldest.date()).days)} if oldest else set()
+        ))
+
+        for day in days:
+            rows = archive_day(session, day, archive_dir) if archive else None
+            start, end = day_bounds(day)
+            if day in partitions:
+                session.execute(text(f"DROP TABLE {partitions[day]}"))
+            # Rows that landed in the DEFAULT partition (or a plain table)
+            session.execute(delete(PredictionLog).where(PredictionLog.created_at >= start, PredictionLog.created_at < end))
+            session.commit()
+            removed.append((day, rows))
+    return removed
+
+
+def maintain_prediction_logs(session_factory=SessionLocal, retention_days=RETENTION_DAYS, archive=True):
+    return {
+        "partitions_created": [str(d) for d in ensure_partitions(session_factory)],
+        "days_rolled_up": [str(d) for d, _ in update_rollups(session_factory)],
+        "days_removed": [str(d) for d, _ in apply_retention(session_factory, retention_days, archive)]
+    }
+
+
+# -----------------------------
+# Dashboard queries
+# -----------------------------
+# Per (day, risk category): predictions, mean probability and the decile histogram
+def rollup_summary(rollups: list):
+    days = {}
+    for r in rollups:
+        entry = days.setdefault((r.day, r.risk_category), {
+            "day": r.day.isoformat(), "risk_category": r.risk_category,
+            "predictions": 0, "probability_sum": 0.0, "histogram": [0] * 10
+        })
+        entry["predictions"] += r.predictions
+        entry["probability_sum"] += r.probability_sum
+        entry["histogram"][r.probability_bucket] += r.predictions
+    summary = []
+    for key in sorted(days):
+        entry = days[key]
+        entry["mean_probability"] = entry.pop("probability_sum") / entry["predictions"] if entry["predictions"] else None
+        summary.append(entry)
+    return summary
+
+def rollup_query(since: date, model_version=None):
+    query = select(PredictionRollup).where(PredictionRollup.day >= since)
+    if model_version is not None:
+        query = query.where(PredictionRollup.model_version == model_version)
+    return query.order_by(PredictionRollup.day)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain prediction_logs partitions, daily rollups and retention")
+    parser.add_argument("--migrate", action="store_true", help="convert an existing unpartitioned prediction_logs table first")
+    parser.add_argument("--retention-days", type=int, default=RETENTION_DAYS)
+    parser.add_argument("--no-archive", action="store_true", help="drop expired days without writing Parquet")
+    args = parser.parse_args()
+
+    if args.migrate:
+        print("✅ prediction_logs converted to daily partitions" if migrate_to_partitioned() else "prediction_logs is already partitioned")
+    Base.metadata.create_all(bind=engine)
+    result = maintain_prediction_logs(retention_days=args.retention_days, archive=not args.no_archive)
+    print(f"✅ Partitions created: {len(result['partitions_created'])}")
+    print(f"✅ Days rolled up: {', '.join(result['days_rolled_up']) or 'none'}")
+    print(f"✅ Days removed: {', '.join(result['days_removed']) or 'none'}")
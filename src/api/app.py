@@ -1,66 +1,141 @@
-import pandas as pd
-from pathlib import Path
-from fastapi import FastAPI, Request, Depends
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel
-from typing import List
-from sqlalchemy.orm import Session
-import joblib
+import asyncio
+import os
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Union
+from contextlib import asynccontextmanager
 import time
-from datetime import datetime
+from datetime import datetime, timedelta
 import logging
 
-from .tasks import  predict_async
-from .database import engine, get_db
-from .models import Base, PredictionLog
-from .cache import generate_key, get_cache, set_cache
-from celery.result import AsyncResult
-from .celery_worker import celery_app
+from .redis_client import redis_client
+from .database import async_engine, AsyncSessionLocal
+from .connections import broker_redis, observe_pools, pool_stats
+from .models import Base
+from .prediction_logger import PredictionLogWriter
+from .cache import get_cache, set_cache, get_cache_many, set_cache_many, cache_stats
+from .scoring import risk_category, to_matrix
+from .model_registry import ModelRegistry
+from .batcher import MicroBatcher
+from .feature_store import get_features, record_payments, set_profile
+from .telemetry import (
+    CELERY_QUEUE_DEPTH, REQUEST_LATENCY, configure_logging, render_metrics, should_log, stage_timers
+)
 
-logging.basicConfig(level=logging.INFO, format="%(asctime)s | %(levelname)s | %(message)s")
+configure_logging()
 logger = logging.getLogger(__name__)
 
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-MODEL_PATH = PROJECT_ROOT / "models" / "credit_risk_model.pkl"
-model = joblib.load(MODEL_PATH)
-logger.info(f"✅ Model loaded from {MODEL_PATH}")
+registry = ModelRegistry()
+batcher = MicroBatcher(lambda: registry.current)
 
-Base.metadata.create_all(bind=engine)
+log_writer = PredictionLogWriter(AsyncSessionLocal)
 
-app = FastAPI(title="Credit Risk API", version="1.0", description="Production Credit Risk Scoring Service")
+# Create missing tables at startup rather than at import. Set DB_CREATE_SCHEMA=0
+# when the schema is managed out of band (python -m src.api.models).
+CREATE_SCHEMA = os.getenv("DB_CREATE_SCHEMA", "1") == "1"
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if CREATE_SCHEMA:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        # Day partitions for prediction_logs (Postgres) before the first hourly
+        # maintenance run, so rows never pile up in the DEFAULT partition
+        from src.analysis.log_retention import ensure_partitions
+        await asyncio.to_thread(ensure_partitions)
+    log_writer.start()
+    watcher = asyncio.create_task(registry.watch())  # hot-swap models/ on change
+    yield
+    watcher.cancel()
+    await log_writer.stop()  # flush buffered prediction logs on shutdown
+
+app = FastAPI(title="Credit Risk API", version="1.0", description="Production Credit Risk Scoring Service", lifespan=lifespan)
+
+# Latency histogram for every request; a sampled JSON access log line
+# (errors and slow requests always) instead of one f-string line per request
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    start_time = time.time()
+    start_time = time.perf_counter()
+    request.state.start_time = start_time
     response = await call_next(request)
-    process_time = round((time.time() - start_time) * 1000, 2)
-    logger.info(f"{request.method} {request.url.path} | Status: {response.status_code} | Time: {process_time}ms")
+    duration = time.perf_counter() - start_time
+    route = request.scope.get("route")
+    # Route template, not the raw path, so ids don't explode label cardinality
+    REQUEST_LATENCY.labels(request.method, route.path if route else "unmatched", response.status_code).observe(duration)
+    if should_log(response.status_code, duration * 1000):
+        logger.info("request", extra={"fields": {
+            "method": request.method,
+            "path": request.url.path,
+            "status": response.status_code,
+            "duration_ms": round(duration * 1000, 2)
+        }})
     return response
 
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
-    logger.error(f"ERROR at {request.url.path}: {str(exc)}")
+    logger.error("unhandled error", exc_info=exc, extra={"fields": {"path": request.url.path}})
     return JSONResponse(status_code=500, content={"error": "Internal Server Error"})
 
 @app.get("/")
-def home():
+async def home():
     return {"message": "Credit Risk API is running 🚀"}
 
 @app.get("/v1/health")
-def health_check():
+async def health_check():
     return {"status": "healthy", "model_loaded": True}
 
+@app.get("/metrics")
+async def metrics():
+    try:
+        # Read from the broker itself (CELERY_BROKER_URL may differ from REDIS_URL)
+        if broker_redis is not None:
+            CELERY_QUEUE_DEPTH.labels("celery").set(await broker_redis.llen("celery"))
+    except Exception as exc:
+        logger.warning("celery queue depth unavailable", extra={"fields": {"error": str(exc)}})
+    observe_pools()
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+@app.get("/v1/cache-stats")
+async def cache_statistics():
+    return cache_stats()
+
+# Daily prediction counts / probability histograms per risk category, from the
+# rollup table (never the raw logs), for dashboards
+@app.get("/v1/prediction-rollups")
+async def prediction_rollups(days: int = 30, model_version: Optional[str] = None):
+    from src.analysis.log_retention import rollup_query, rollup_summary
+    since = datetime.utcnow().date() - timedelta(days=days)
+    async with AsyncSessionLocal() as db:
+        rollups = (await db.scalars(rollup_query(since, model_version))).all()
+    return {"since": since, "days": rollup_summary(rollups)}
+
+@app.get("/v1/pool-stats")
+async def pool_statistics():
+    return pool_stats()
+
 @app.get("/v1/model-info")
-def model_info():
+async def model_info():
+    current = registry.current
     return {
         "model_name": "Credit Risk Logistic Regression",
         "version": "1.0",
+        "model_version": current.version,
+        "loaded_at": current.loaded_at,
+        "explanations_available": current.explainer is not None,
         "trained_on": "Synthetic Credit Data",
-        "features_used": len(model.feature_names_in_),
+        "features_used": len(current.scorer.feature_names),
         "status": "ready",
         "timestamp": datetime.now()
     }
 
+# Re-read the artifact off the event loop and swap it in if it changed
+@app.post("/v1/admin/reload-model")
+async def reload_model():
+    swapped = await asyncio.to_thread(registry.reload, True)
+    return {"reloaded": swapped, "model_version": registry.current.version}
+
 class UserFeatures(BaseModel):
     avg_payment_delay: float
     max_payment_delay: float
@@ -75,42 +150,245 @@ class UserFeatures(BaseModel):
     age_26_35: int
     age_36_50: int
 
+# Score a known customer from the feature store instead of sending features
+class UserReference(BaseModel):
+    user_id: str
+
+# Feature dict for a request: as sent, or looked up in the feature store (None if unknown)
+async def resolve_features(features):
+    if isinstance(features, UserReference):
+        return await get_features(features.user_id)
+    return features.dict()
+
+def unknown_user(features):
+    return JSONResponse(status_code=404, content={"error": f"No stored features for user {features.user_id}"})
+
+PREDICT_STAGES = stage_timers("predict", [
+    "parse_validate", "resolve_features", "cache_get", "model", "log_enqueue", "cache_set"
+])
+
 @app.post("/v1/predict")
-def predict_risk(features: UserFeatures, db: Session = Depends(get_db)):
-    input_data = features.dict()
-    cache_key = generate_key(input_data)
-    cached = get_cache(cache_key)
+async def predict_risk(features: Union[UserFeatures, UserReference], request: Request):
+    # Body read + routing + pydantic validation: middleware start -> handler entry
+    PREDICT_STAGES["parse_validate"].observe(time.perf_counter() - request.state.start_time)
+    with PREDICT_STAGES["resolve_features"].time():
+        input_data = await resolve_features(features)
+    if input_data is None:
+        return unknown_user(features)
+    with PREDICT_STAGES["cache_get"].time():
+        cached = await get_cache(input_data, registry.current.version)
     if cached:
-        logger.info("⚡ CACHE HIT — Returned from Redis")
+        logger.debug("cache hit")
         return cached
-    logger.info("❌ CACHE MISS — Running Model")
-    df = pd.DataFrame([input_data])
-    probability = model.predict_proba(df)[0][1]
-    risk_category = (
-        "High Risk" if probability > 0.7
-        else "Medium Risk" if probability > 0.3
-        else "Low Risk"
-    )
+    # Coalesced with concurrent requests into one vectorized pass (includes the batching window)
+    with PREDICT_STAGES["model"].time():
+        probability, version = await batcher.predict(input_data)
     result = {
         "default_probability": float(probability),
-        "risk_category": risk_category
+        "risk_category": risk_category(probability),
+        "model_version": version
     }
-    log = PredictionLog(
-        **input_data,
-        default_probability=result["default_probability"],
-        risk_category=result["risk_category"]
-    )
-    db.add(log)
-    db.commit()
-    db.refresh(log)
-    result["saved_record_id"] = log.id
-    set_cache(cache_key, result)
+    # Write-behind: the row is flushed to Postgres in the background
+    with PREDICT_STAGES["log_enqueue"].time():
+        saved_id = await log_writer.log({**input_data, **result})
+    result["saved_record_id"] = str(saved_id)
+    with PREDICT_STAGES["cache_set"].time():
+        await set_cache(input_data, version, result)
     return result
 
+# Celery is imported on first use, not at startup (it is only needed to submit
+# and look up tasks). Publishing is a blocking client call, so these endpoints
+# stay on the threadpool.
 @app.post("/v1/predict-async")
 def predict_async_endpoint(features: UserFeatures):
+    from .tasks import predict_async
     task = predict_async.delay(features.dict())
     return {
         "task_id": task.id,
         "status": "Processing"
-    }
\ No newline at end of file
+    }
+
+# Result of a /v1/predict-async task. With wait > 0 the call long-polls
+# (up to 30s) until the task finishes, so clients need no tight polling loop.
+@app.get("/v1/predict-async/{task_id}")
+async def predict_async_result(task_id: str, wait: float = 0):
+    from celery.result import AsyncResult
+    from celery.states import READY_STATES
+    from .celery_worker import celery_app
+    result = AsyncResult(task_id, app=celery_app)
+    deadline = time.monotonic() + min(max(wait, 0), 30)
+    state = await asyncio.to_thread(lambda: result.state)
+    while state not in READY_STATES and time.monotonic() < deadline:
+        await asyncio.sleep(0.1)
+        state = await asyncio.to_thread(lambda: result.state)
+
+    response = {"task_id": task_id, "status": state}
+    if state == "SUCCESS":
+        response["result"] = result.result
+    elif state == "FAILURE":
+        response["error"] = str(result.result)
+    return response
+
+@app.post("/v1/predict-batch")
+async def predict_risk_batch(features: List[UserFeatures]):
+    rows = [f.dict() for f in features]
+    current = registry.current
+
+    # In-process lookup first, then one MGET for the remaining rows
+    results = await get_cache_many(rows, current.version)
+    miss_idx = [i for i, cached in enumerate(results) if not cached]
+    logger.debug("batch", extra={"fields": {"rows": len(rows), "cache_hits": len(rows) - len(miss_idx)}})
+
+    if miss_idx:
+        # One vectorized pass over all misses
+        probabilities = current.scorer.predict_many(to_matrix([rows[i] for i in miss_idx]))
+
+        log_rows = []
+        for i, probability in zip(miss_idx, probabilities):
+            results[i] = {
+                "default_probability": float(probability),
+                "risk_category": risk_category(probability),
+                "model_version": current.version
+            }
+            log_rows.append({**rows[i], **results[i]})
+
+        # Buffered and flushed in bulk by the write-behind logger
+        saved_ids = await log_writer.log_many(log_rows)
+        for i, saved_id in zip(miss_idx, saved_ids):
+            results[i]["saved_record_id"] = str(saved_id)
+        await set_cache_many([(rows[i], results[i]) for i in miss_idx], current.version)
+
+    return {
+        "count": len(results),
+        "cache_hits": len(results) - len(miss_idx),
+        "predictions": results
+    }
+
+# Explanations are cached next to predictions, in their own key namespace
+def explain_cache_version(version: str):
+    return version + ":explain"
+
+def no_explainer():
+    return JSONResponse(status_code=503, content={
+        "error": "Explanations need a logistic model artifact with background statistics; retrain with src.modeling.pipeline"
+    })
+
+# Per-feature contributions (log-odds) for one applicant; closed form, no shap import
+@app.post("/v1/explain")
+async def explain_risk(features: Union[UserFeatures, UserReference]):
+    input_data = await resolve_features(features)
+    if input_data is None:
+        return unknown_user(features)
+    current = registry.current
+    if current.explainer is None:
+        return no_explainer()
+
+    cache_version = explain_cache_version(current.version)
+    cached = await get_cache(input_data, cache_version)
+    if cached:
+        return cached
+    X = to_matrix([input_data])
+    probability = float(current.scorer.predict_many(X)[0])
+    result = {
+        "default_probability": probability,
+        "risk_category": risk_category(probability),
+        "model_version": current.version,
+        **current.explainer.to_dict(current.explainer.explain_many(X)[0])
+    }
+    await set_cache(input_data, cache_version, result)
+    return result
+
+@app.post("/v1/explain-batch")
+async def explain_risk_batch(features: List[UserFeatures]):
+    rows = [f.dict() for f in features]
+    current = registry.current
+    if current.explainer is None:
+        return no_explainer()
+
+    cache_version = explain_cache_version(current.version)
+    results = await get_cache_many(rows, cache_version)
+    miss_idx = [i for i, cached in enumerate(results) if not cached]
+    if miss_idx:
+        # One matrix pass for probabilities and contributions of all misses
+        X = to_matrix([rows[i] for i in miss_idx])
+        probabilities = current.scorer.predict_many(X)
+        contributions = current.explainer.explain_many(X)
+        for i, probability, row_contributions in zip(miss_idx, probabilities.tolist(), contributions):
+            results[i] = {
+                "default_probability": probability,
+                "risk_category": risk_category(probability),
+                "model_version": current.version,
+                **current.explainer.to_dict(row_contributions)
+            }
+        await set_cache_many([(rows[i], results[i]) for i in miss_idx], cache_version)
+
+    return {
+        "count": len(results),
+        "cache_hits": len(results) - len(miss_idx),
+        "explanations": results
+    }
+
+class PaymentEvent(BaseModel):
+    user_id: str
+    payment_amount: float
+    total_due: float = Field(gt=0)     # billing cycle total
+    credit_limit: float = Field(gt=0)  # limit of the card the cycle belongs to
+    days_late: int
+    default_flag: int = 0
+
+class UserProfile(BaseModel):
+    income_band: Literal["low", "medium", "high"]
+    age_group: Literal["18-25", "26-35", "36-50", "51+"]
+
+# Fold new payments into the per-user running aggregates (O(1) per event)
+@app.post("/v1/features/payments")
+async def ingest_payments(events: List[PaymentEvent]):
+    counts = await record_payments([e.dict() for e in events])
+    return {"recorded": len(counts)}
+
+@app.put("/v1/features/{user_id}/profile")
+async def update_profile(user_id: str, profile: UserProfile):
+    await set_profile(user_id, profile.income_band, profile.age_group)
+    return {"user_id": user_id, **profile.dict()}
+
+@app.get("/v1/features/{user_id}")
+async def user_features(user_id: str):
+    features = await get_features(user_id)
+    if features is None:
+        return JSONResponse(status_code=404, content={"error": f"No stored features for user {user_id}"})
+    return {"user_id": user_id, "features": features}
+
+class BulkScoringRequest(BaseModel):
+    input_path: str                    # CSV under data/, one applicant per row
+    output_path: Optional[str] = None  # new .csv/.parquet under data/scored/, defaults to data/scored/<job_id>.csv
+    chunk_size: int = Field(50000, gt=0)
+
+@app.post("/v1/predict-bulk")
+def predict_bulk(request: BulkScoringRequest):
+    from .tasks import resolve_data_path, resolve_output_path, score_file
+    try:
+        resolve_data_path(request.input_path)
+        if request.output_path:
+            resolve_output_path(request.output_path)
+    except ValueError as exc:
+        return JSONResponse(status_code=400, content={"error": str(exc)})
+    task = score_file.delay(request.input_path, request.output_path, request.chunk_size)
+    return {
+        "job_id": task.id,
+        "status": "Processing"
+    }
+
+@app.get("/v1/predict-bulk/{job_id}")
+def predict_bulk_status(job_id: str):
+    from celery.result import AsyncResult
+    from .tasks import bulk_job_key, celery_app
+    job = redis_client.hgetall(bulk_job_key(job_id))
+    if not job:
+        # Not picked up by a worker yet (or unknown id)
+        return {"job_id": job_id, "status": AsyncResult(job_id, app=celery_app).state}
+    total, done = int(job["total_chunks"]), int(job["done_chunks"])
+    return {
+        "job_id": job_id,
+        **job,
+        "progress": round(done / total, 4) if total else 1.0
+    }
@@ -0,0 +1,101 @@
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .scoring import to_matrix
+
+
+# Score a list of (features, future) pairs with one vectorized pass and
+# resolve each future with (probability, model_version)
+def _resolve_batch(get_model, batch):
+    try:
+        current = get_model()
+        probabilities = current.scorer.predict_many(to_matrix([features for features, _ in batch]))
+    except Exception as exc:
+        for _, fut in batch:
+            if not fut.done():
+                fut.set_exception(exc)
+        return
+    for (_, fut), probability in zip(batch, probabilities.tolist()):
+        if not fut.done():  # caller may have gone away
+            fut.set_result((probability, current.version))
+
+
+# Coalesces concurrent predictions on the event loop. The first request of a
+# batch opens a window of max_wait_ms; everything that arrives before it
+# closes (or until max_batch requests) is scored together.
+class MicroBatcher:
+
+    def __init__(self, get_model, max_batch=256, max_wait_ms=1.0):
+        self.get_model = get_model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._pending = []
+        self._timer = None
+
+    async def predict(self, features: dict):
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._pending.append((features, fut))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await fut
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            _resolve_batch(self.get_model, batch)
+
+
+# Same batching for blocking callers (Celery tasks). Requests from concurrent
+# worker threads are coalesced by a background thread; the thread is
+# (re)started lazily per process so it survives prefork.
+class ThreadedMicroBatcher:
+
+    def __init__(self, get_model, max_batch=256, max_wait_ms=1.0):
+        self.get_model = get_model
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def submit(self, features: dict):
+        self._ensure_worker()
+        fut = Future()
+        self._queue.put((features, fut))
+        return fut
+
+    def predict(self, features: dict):
+        return self.submit(features).result()
+
+    def _ensure_worker(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._queue = queue.Queue()
+                threading.Thread(target=self._run, args=(self._queue,), daemon=True, name="micro-batcher").start()
+                self._pid = os.getpid()
+
+    def _run(self, pending):
+        while True:
+            batch = [pending.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(pending.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            _resolve_batch(self.get_model, batch)
@@ -1,27 +1,141 @@
-import redis
 import json
 import hashlib
+import time
+from collections import OrderedDict
 
-# Connect to Redis container
-redis_client = redis.Redis(
-    host="redis",   # Docker service name
-    port=6379,
-    decode_responses=True
-)
+from .connections import async_redis
+from .scoring import FEATURE_COLUMNS
+from .telemetry import CACHE_L1_HIT, CACHE_L1_MISS, CACHE_L2_HIT, CACHE_L2_MISS
 
-# Generate unique cache key
-def generate_key(data: dict):
-    return hashlib.md5(
+# asyncio client on the process-wide Redis pool (REDIS_URL, see connections.py)
+redis_client = async_redis
+
+CACHE_TTL = 3600
+
+
+# In-process LRU with per-entry expiry (L1, in front of Redis)
+class LocalCache:
+
+    def __init__(self, maxsize=50000, ttl=CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        entry = self._data.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, ttl=None):
+        self._data[key] = (time.monotonic() + (ttl or self.ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+local_cache = LocalCache()
+redis_stats = {"hits": 0, "misses": 0}
+
+# L1 key: model version + the 12 feature values in model order,
+# as floats so 1 and 1.0 collide
+def local_key(data: dict, version: str):
+    return (version, *(float(data[col]) for col in FEATURE_COLUMNS))
+
+# Generate unique cache key (L2 / Redis), namespaced by model version so a
+# swapped model never serves the previous model's probabilities
+def generate_key(data: dict, version: str):
+    return version + ":" + hashlib.md5(
         json.dumps(data, sort_keys=True).encode()
     ).hexdigest()
 
-# Get cached result
-def get_cache(key: str):
-    data = redis_client.get(key)
+# Seconds an L2 entry has left (PTTL, in ms), so a copy promoted to L1
+# never outlives it; None when the key expired between the two reads
+def remaining_ttl(pttl_ms: int):
+    if pttl_ms == -1:  # no expiry set
+        return CACHE_TTL
+    return pttl_ms / 1000 if pttl_ms > 0 else None
+
+# Get cached result: L1 first, then Redis (value and PTTL in one round trip)
+async def get_cache(data: dict, version: str):
+    lkey = local_key(data, version)
+    cached = local_cache.get(lkey)
+    if cached is not None:
+        CACHE_L1_HIT.inc()
+        return cached
+    CACHE_L1_MISS.inc()
+    key = generate_key(data, version)
+    async with redis_client.pipeline(transaction=False) as pipe:
+        data, pttl = await pipe.get(key).pttl(key).execute()
     if data:
-        return json.loads(data)
+        redis_stats["hits"] += 1
+        CACHE_L2_HIT.inc()
+        cached = json.loads(data)
+        ttl = remaining_ttl(pttl)
+        if ttl:
+            local_cache.set(lkey, cached, ttl)
+        return cached
+    redis_stats["misses"] += 1
+    CACHE_L2_MISS.inc()
     return None
 
-# Save result to Redis
-def set_cache(key: str, value: dict, ttl=3600):
-    redis_client.setex(key, ttl, json.dumps(value))
+# Save result to both tiers
+async def set_cache(data: dict, version: str, value: dict, ttl=CACHE_TTL):
+    local_cache.set(local_key(data, version), value, ttl)
+    await redis_client.setex(generate_key(data, version), ttl, json.dumps(value))
+
+# Get cached results for many feature dicts; L1 misses go to Redis in one MGET
+async def get_cache_many(rows: list, version: str):
+    lkeys = [local_key(row, version) for row in rows]
+    results = [local_cache.get(lkey) for lkey in lkeys]
+    miss_idx = [i for i, cached in enumerate(results) if cached is None]
+    CACHE_L1_HIT.inc(len(rows) - len(miss_idx))
+    CACHE_L1_MISS.inc(len(miss_idx))
+    if not miss_idx:
+        return results
+    keys = [generate_key(rows[i], version) for i in miss_idx]
+    async with redis_client.pipeline(transaction=False) as pipe:
+        pipe.mget(keys)
+        for key in keys:
+            pipe.pttl(key)
+        remote, *pttls = await pipe.execute()
+    hits = 0
+    for i, data, pttl in zip(miss_idx, remote, pttls):
+        if data:
+            hits += 1
+            results[i] = json.loads(data)
+            ttl = remaining_ttl(pttl)
+            if ttl:
+                local_cache.set(lkeys[i], results[i], ttl)
+    redis_stats["hits"] += hits
+    redis_stats["misses"] += len(miss_idx) - hits
+    CACHE_L2_HIT.inc(hits)
+    CACHE_L2_MISS.inc(len(miss_idx) - hits)
+    return results
+
+# Save many (features, result) pairs to both tiers in one pipelined round trip
+async def set_cache_many(items: list, version: str, ttl=CACHE_TTL):
+    if not items:
+        return
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for data, value in items:
+            local_cache.set(local_key(data, version), value, ttl)
+            pipe.setex(generate_key(data, version), ttl, json.dumps(value))
+        await pipe.execute()
+
+# Hit/miss counters per tier
+def cache_stats():
+    return {
+        "l1": {"hits": local_cache.hits, "misses": local_cache.misses, "size": len(local_cache)},
+        "l2": dict(redis_stats)
+    }
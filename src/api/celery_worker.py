@@ -1,14 +1,83 @@
+import os
+import time
 from celery import Celery
+from celery.signals import task_prerun, task_postrun, worker_init, worker_process_shutdown, worker_ready
+
+from .connections import CELERY_BROKER_URL, CELERY_RESULT_BACKEND, CELERY_BROKER_POOL_LIMIT, REDIS_MAX_CONNECTIONS
+from .telemetry import CELERY_TASK_RUNTIME, mark_process_dead, metrics_registry
+from .workers import freeze_heap, worker_count
 
 celery_app = Celery(
     "credit_risk",
-    broker="redis://redis:6379/0",
-    backend="redis://redis:6379/0"
+    broker=CELERY_BROKER_URL,
+    backend=CELERY_RESULT_BACKEND
 )
 
-celery_app.conf.task_serializer = "json"
-celery_app.conf.result_serializer = "json"
-celery_app.conf.accept_content = ["json"]
+# kombu and the result backend keep their own pools (they cannot share the
+# redis-py pool in connections.py); cap them so a worker's sockets stay bounded
+celery_app.conf.broker_pool_limit = CELERY_BROKER_POOL_LIMIT
+celery_app.conf.redis_max_connections = REDIS_MAX_CONNECTIONS
+
+# One prefork child per available CPU unless CELERY_CONCURRENCY says otherwise
+celery_app.conf.worker_concurrency = worker_count("CELERY_CONCURRENCY")
+
+# msgpack is smaller and faster to (de)serialize than JSON for our
+# flat feature/result dicts; results expire instead of piling up in Redis
+celery_app.conf.task_serializer = "msgpack"
+celery_app.conf.result_serializer = "msgpack"
+celery_app.conf.accept_content = ["msgpack"]
+celery_app.conf.result_expires = 3600
+
+# Run under `celery beat`; each run only reads prediction logs newer than its watermark
+# (log maintenance: partitions ahead, daily rollups, retention)
+celery_app.conf.beat_schedule = {
+    "fairness-stats": {"task": "src.api.tasks.update_fairness_stats", "schedule": 300.0},
+    "prediction-log-maintenance": {"task": "src.api.tasks.maintain_prediction_logs", "schedule": 3600.0}
+}
 
 # Register tasks
 celery_app.autodiscover_tasks(["src.api"])
+
+# -----------------------------
+# Task runtime metrics
+# -----------------------------
+# Served by the worker on CELERY_METRICS_PORT; with the prefork pool set
+# PROMETHEUS_MULTIPROC_DIR so the child processes' samples are included.
+_task_started = {}
+
+@task_prerun.connect
+def _start_task_timer(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+@task_postrun.connect
+def _observe_task_runtime(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        CELERY_TASK_RUNTIME.labels(task.name, state or "UNKNOWN").observe(time.perf_counter() - started)
+
+@worker_ready.connect
+def _serve_metrics(**kwargs):
+    from prometheus_client import start_http_server
+    start_http_server(int(os.getenv("CELERY_METRICS_PORT", "9808")), registry=metrics_registry())
+
+
+# -----------------------------
+# Prefork: load the model once, before the children are forked
+# -----------------------------
+# worker_init runs in the parent before the pool starts, so every child
+# inherits the loaded registry copy-on-write instead of loading its own.
+# Inherited DB/Redis pools are reset in each child by connections.py.
+@worker_init.connect
+def _preload_model(sender=None, **kwargs):
+    from celery.concurrency import get_implementation
+    from .tasks import get_registry, use_batching
+    # Only pools running several tasks in one process (threads, gevent,
+    # eventlet) can coalesce predict_async calls
+    pool = get_implementation(getattr(sender, "pool_cls", None) or celery_app.conf.worker_pool)
+    use_batching(pool.is_green or pool.__module__ == "celery.concurrency.thread")
+    get_registry()
+    freeze_heap()
+
+@worker_process_shutdown.connect
+def _forget_child_metrics(pid=None, **kwargs):
+    mark_process_dead(pid or os.getpid())
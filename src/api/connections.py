@@ -0,0 +1,123 @@
+import os
+
+import redis
+import redis.asyncio
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+from .telemetry import DB_POOL_CHECKED_OUT, DB_POOL_CONNECTIONS_OPENED, REDIS_POOL_CONNECTIONS
+
+# -----------------------------
+# Settings (environment, with the docker-compose defaults)
+# -----------------------------
+REDIS_URL = os.getenv("REDIS_URL", "redis://redis:6379/0")
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "64"))
+
+DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://admin:admin123@db:5432/creditrisk")
+# Same database through asyncpg, whatever driver (or postgres:// alias) DATABASE_URL names
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or make_url(DATABASE_URL).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds; stay under server/proxy idle timeouts
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "1") == "1"
+
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", REDIS_URL)
+CELERY_RESULT_BACKEND = os.getenv("CELERY_RESULT_BACKEND", REDIS_URL)
+CELERY_BROKER_POOL_LIMIT = int(os.getenv("CELERY_BROKER_POOL_LIMIT", "10"))
+
+
+# -----------------------------
+# Redis: one pool per process and flavour
+# -----------------------------
+# Every module talks to Redis through these two clients (asyncio for the
+# request path, blocking for Celery tasks and scripts), so a process holds at
+# most REDIS_MAX_CONNECTIONS sockets per flavour instead of one pool per module.
+sync_pool = redis.ConnectionPool.from_url(REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS, decode_responses=True)
+async_pool = redis.asyncio.ConnectionPool.from_url(REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS, decode_responses=True)
+
+sync_redis = redis.Redis(connection_pool=sync_pool)
+async_redis = redis.asyncio.Redis(connection_pool=async_pool)
+
+# The Celery broker may be a different Redis than REDIS_URL; the API only
+# reads queue lengths from it (for /metrics), so its pool stays tiny.
+# None when the broker is not Redis.
+broker_pool = (
+    redis.asyncio.ConnectionPool.from_url(CELERY_BROKER_URL, max_connections=2, decode_responses=True)
+    if CELERY_BROKER_URL.startswith(("redis://", "rediss://", "unix://")) else None
+)
+broker_redis = redis.asyncio.Redis(connection_pool=broker_pool) if broker_pool is not None else None
+
+
+# -----------------------------
+# SQLAlchemy engines
+# -----------------------------
+def engine_options():
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING
+    }
+
+_engines = {}
+
+# Track an engine for fork handling and pool metrics (checkouts, new connections)
+def register_engine(name: str, engine):
+    sync_engine = getattr(engine, "sync_engine", engine)
+    checked_out = DB_POOL_CHECKED_OUT.labels(name)
+    opened = DB_POOL_CONNECTIONS_OPENED.labels(name)
+    event.listen(sync_engine, "connect", lambda *args: opened.inc())
+    event.listen(sync_engine, "checkout", lambda *args: checked_out.inc())
+    event.listen(sync_engine, "checkin", lambda *args: checked_out.dec())
+    _engines[name] = engine
+    return engine
+
+
+# -----------------------------
+# Per-process initialization after fork
+# -----------------------------
+# gunicorn --preload and Celery prefork fork after these modules are imported.
+# A child must never reuse the parent's sockets: drop inherited DB connections
+# without closing them (they still belong to the parent) and empty the Redis
+# pools so each child opens its own connections lazily.
+def reset_after_fork():
+    for engine in _engines.values():
+        getattr(engine, "sync_engine", engine).dispose(close=False)
+    sync_pool.reset()
+    async_pool.reset()
+    if broker_pool is not None:
+        broker_pool.reset()
+    for name in _engines:
+        DB_POOL_CHECKED_OUT.labels(name).set(0)
+
+os.register_at_fork(after_in_child=reset_after_fork)
+
+
+# -----------------------------
+# Pool utilization
+# -----------------------------
+def pool_stats():
+    stats = {"database": {}, "redis": {}}
+    for name, engine in _engines.items():
+        pool = getattr(engine, "sync_engine", engine).pool
+        stats["database"][name] = {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow()
+        } if hasattr(pool, "checkedout") else {"pool": type(pool).__name__}
+    for name, pool in (("sync", sync_pool), ("async", async_pool)):
+        stats["redis"][name] = {
+            "max_connections": pool.max_connections,
+            "in_use": len(pool._in_use_connections),
+            "available": len(pool._available_connections)
+        }
+    return stats
+
+# Copy the Redis pool gauges into Prometheus (called at scrape time)
+def observe_pools():
+    for flavour, stats in pool_stats()["redis"].items():
+        REDIS_POOL_CONNECTIONS.labels(flavour, "in_use").set(stats["in_use"])
+        REDIS_POOL_CONNECTIONS.labels(flavour, "available").set(stats["available"])
@@ -1,12 +1,19 @@
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
-DATABASE_URL = "postgresql://admin:admin123@db:5432/creditrisk"
+from .connections import DATABASE_URL, ASYNC_DATABASE_URL, engine_options, register_engine
 
-engine = create_engine(DATABASE_URL)
+# Sync engine: schema creation and scripts
+engine = register_engine("sync", create_engine(DATABASE_URL, **engine_options()))
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: request path
+async_engine = register_engine("async", create_async_engine(ASYNC_DATABASE_URL, **engine_options()))
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 def get_db():
     db = SessionLocal()
@@ -14,3 +21,7 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
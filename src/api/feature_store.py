@@ -0,0 +1,148 @@
+import math
+
+from .cache import redis_client
+from .scoring import FEATURE_COLUMNS
+
+# Online feature store: one Redis hash per user holding the sufficient
+# statistics behind the 12 model features, so a new payment is an O(1) update
+# and scoring a known user needs no history scan.
+#   features:user:<user_id> -> count, delay_sum, delay_mean, delay_m2, delay_max,
+#                              ratio_sum, ratio_min, util_sum, util_max,
+#                              default_max, income_band, age_group
+FEATURE_KEY_PREFIX = "features:user:"
+
+
+def feature_key(user_id: str):
+    return FEATURE_KEY_PREFIX + str(user_id)
+
+
+# Atomically fold one payment into a user's aggregates. The delay variance uses
+# Welford's update (as in src/modeling/feature_engineering.py) rather than a
+# raw sum of squares, which cancels badly for long histories. Numbers are
+# written with %.17g because Lua's default tostring keeps only 14 digits.
+_RECORD_PAYMENT = """
+local function num(v, default) return tonumber(v) or default end
+local function fmt(x) return string.format('%.17g', x) end
+local s = redis.call('HMGET', KEYS[1], 'count', 'delay_sum', 'delay_mean', 'delay_m2', 'delay_max',
+                     'ratio_sum', 'ratio_min', 'util_sum', 'util_max', 'default_max')
+local delay, ratio, util, default = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local n = num(s[1], 0) + 1
+local mean = num(s[3], 0)
+local new_mean = mean + (delay - mean) / n
+redis.call('HSET', KEYS[1],
+    'count', n,
+    'delay_sum', fmt(num(s[2], 0) + delay),
+    'delay_mean', fmt(new_mean),
+    'delay_m2', fmt(num(s[4], 0) + (delay - new_mean) * (delay - mean)),
+    'delay_max', fmt(math.max(num(s[5], -math.huge), delay)),
+    'ratio_sum', fmt(num(s[6], 0) + ratio),
+    'ratio_min', fmt(math.min(num(s[7], math.huge), ratio)),
+    'util_sum', fmt(num(s[8], 0) + util),
+    'util_max', fmt(math.max(num(s[9], -math.huge), util)),
+    'default_max', math.max(num(s[10], 0), default))
+return n
+"""
+record_payment_script = redis_client.register_script(_RECORD_PAYMENT)
+
+
+# Per-payment values, derived exactly as in feature engineering:
+# delay = days_late, ratio = paid / total_due, utilization = total_due / credit_limit
+def payment_values(event: dict):
+    return (
+        float(event["days_late"]),
+        event["payment_amount"] / event["total_due"],
+        event["total_due"] / event["credit_limit"],
+        int(event["default_flag"])
+    )
+
+
+# Apply payment events in one pipelined round trip; returns each user's new payment count
+async def record_payments(events: list):
+    if not events:
+        return []
+    async with redis_client.pipeline(transaction=False) as pipe:
+        for event in events:
+            await record_payment_script(keys=[feature_key(event["user_id"])], args=payment_values(event), client=pipe)
+        return await pipe.execute()
+
+
+async def set_profile(user_id: str, income_band: str, age_group: str):
+    await redis_client.hset(feature_key(user_id), mapping={"income_band": income_band, "age_group": age_group})
+
+
+# Turn a stored hash into the model's 12-feature vector (None if incomplete)
+def to_features(state: dict):
+    if not state.get("count") or "income_band" not in state or "age_group" not in state:
+        return None
+    n = int(state["count"])
+    m2 = max(float(state["delay_m2"]), 0.0)
+    features = {
+        "avg_payment_delay": float(state["delay_sum"]) / n,
+        "max_payment_delay": float(state["delay_max"]),
+        # Sample std; 0 for users with only 1 payment (as in training)
+        "std_payment_delay": math.sqrt(m2 / (n - 1)) if n > 1 else 0.0,
+        "avg_payment_ratio": float(state["ratio_sum"]) / n,
+        "min_payment_ratio": float(state["ratio_min"]),
+        "avg_utilization": float(state["util_sum"]) / n,
+        "max_utilization": float(state["util_max"]),
+        "income_low": int(state["income_band"] == "low"),
+        "income_medium": int(state["income_band"] == "medium"),
+        "age_18_25": int(state["age_group"] == "18-25"),
+        "age_26_35": int(state["age_group"] == "26-35"),
+        "age_36_50": int(state["age_group"] == "36-50")
+    }
+    return {col: features[col] for col in FEATURE_COLUMNS}
+
+
+async def get_features(user_id: str):
+    return to_features(await redis_client.hgetall(feature_key(user_id)))
+
+
+# -----------------------------
+# Backfill from the offline tables
+# -----------------------------
+# Rebuilds every user's hash from data/raw with the same streaming aggregation
+# as feature_engineering.py. Payments recorded while it runs are overwritten,
+# so run it before routing live events to the store.
+def backfill(batch_size=10000):
+    from .redis_client import redis_client as sync_redis
+    from src.modeling.feature_engineering import build_lookups, aggregate_payments
+
+    lookups = build_lookups()
+    aggregates = aggregate_payments(lookups)
+    profiles = (
+        lookups["demographics"]
+        .drop_duplicates("user_id")
+        .set_index("user_id")
+        .reindex(lookups["users"])
+    )
+    income_band = profiles["income_band"].astype(str).tolist()
+    age_group = profiles["age_group"].astype(str).tolist()
+
+    users = [i for i in range(len(lookups["users"])) if aggregates.count[i] > 0]
+    for start in range(0, len(users), batch_size):
+        pipe = sync_redis.pipeline(transaction=False)
+        for i in users[start:start + batch_size]:
+            key = feature_key(lookups["users"][i])
+            pipe.delete(key)
+            pipe.hset(key, mapping={
+                "count": int(aggregates.count[i]),
+                "delay_sum": float(aggregates.delay_sum.total[i]),
+                "delay_mean": float(aggregates.delay_mean[i]),
+                "delay_m2": float(aggregates.delay_m2[i]),
+                "delay_max": float(aggregates.delay_max[i]),
+                "ratio_sum": float(aggregates.ratio_sum.total[i]),
+                "ratio_min": float(aggregates.ratio_min[i]),
+                "util_sum": float(aggregates.util_sum.total[i]),
+                "util_max": float(aggregates.util_max[i]),
+                "default_max": int(aggregates.default_max[i]),
+                "income_band": income_band[i],
+                "age_group": age_group[i]
+            })
+        pipe.execute()
+    return len(users)
+
+
+# python -m src.api.feature_store
+if __name__ == "__main__":
+    print(f"✅ Feature store backfilled for {backfill()} users")
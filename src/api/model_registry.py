@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import io
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from .scoring import CompiledScorer, CompiledExplainer, ModelScorer
+from .telemetry import MODEL_LOAD_SECONDS
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+MODEL_PATH = PROJECT_ROOT / "models" / "credit_risk_model.pkl"
+
+
+# One loaded artifact. Never mutated after construction, so readers that
+# grabbed a reference keep a consistent model/scorer/version triple.
+# The sklearn estimator is only unpickled when something asks for .model
+# (serving uses the scorer), so the API never imports sklearn at startup.
+class LoadedModel:
+
+    def __init__(self, model, scorer, version, path, explainer=None, payload=None):
+        self._model = model
+        self._payload = payload
+        self.scorer = scorer
+        self.version = version
+        self.path = path
+        self.explainer = explainer  # None when the artifact has no background statistics
+        self.loaded_at = datetime.now()
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = unpickle(self._payload)
+        return self._model
+
+
+# Version is the content hash of the artifact, so identical retrains share cache entries
+def artifact_version(payload: bytes):
+    return hashlib.sha256(payload).hexdigest()[:12]
+
+# Metadata written next to the artifact (credit_risk_model.json), {} if absent
+def load_metadata(path=MODEL_PATH):
+    path = Path(path).with_suffix(".json")
+    return json.loads(path.read_text()) if path.exists() else {}
+
+def unpickle(payload: bytes):
+    import joblib
+    return joblib.load(io.BytesIO(payload))
+
+# Coefficient export stored under "scorer" in the metadata: a few hundred bytes
+# of JSON from which CompiledScorer is rebuilt without sklearn
+def scorer_metadata(scorer: CompiledScorer, version: str):
+    return {
+        "version": version,
+        "feature_names": scorer.feature_names,
+        "coef": scorer.coef.tolist(),
+        "intercept": scorer.intercept
+    }
+
+# Linear models get the compiled scorer; anything else scores via predict_proba
+def compile_scorer(model):
+    return CompiledScorer.from_model(model) if hasattr(model, "coef_") else ModelScorer(model)
+
+@MODEL_LOAD_SECONDS.time()
+def load_artifact(path):
+    payload = Path(path).read_bytes()
+    version = artifact_version(payload)
+
+    # Exported coefficients and background means only apply to the artifact
+    # they were computed from (the scorer was checked against it at export)
+    metadata = load_metadata(path)
+    exported = metadata.get("scorer", {})
+    if exported.get("version") == version:
+        model = None
+        scorer = CompiledScorer(exported["feature_names"], exported["coef"], exported["intercept"])
+    else:
+        model = unpickle(payload)
+        scorer = compile_scorer(model)
+    explainer = None
+    if isinstance(scorer, CompiledScorer) and metadata.get("version") == version and "background_means" in metadata:
+        explainer = CompiledExplainer(scorer, metadata["background_means"])
+    return LoadedModel(model, scorer, version, str(path), explainer, payload)
+
+# Add the coefficient export to an existing artifact's metadata
+# (None for a non-linear artifact, which has no coefficients to export)
+def export_scorer(path=MODEL_PATH):
+    path = Path(path)
+    payload = path.read_bytes()
+    version = artifact_version(payload)
+    scorer = compile_scorer(unpickle(payload))
+    if not isinstance(scorer, CompiledScorer):
+        return None
+    metadata = {**load_metadata(path), "scorer": scorer_metadata(scorer, version)}
+    tmp = path.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(metadata, indent=2, default=str))
+    tmp.replace(path.with_suffix(".json"))
+    return version
+
+
+# Holds the live model and swaps it atomically when the artifact on disk changes.
+# A failed load (corrupt file, scorer mismatch) keeps serving the previous model.
+class ModelRegistry:
+
+    def __init__(self, path=MODEL_PATH, check_interval=5.0):
+        self.path = Path(path)
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._signature = self._stat()
+        self._next_check = time.monotonic() + check_interval
+        self.current = load_artifact(self.path)
+        logger.info(f"✅ Model {self.current.version} loaded from {self.path}")
+
+    def _stat(self):
+        st = self.path.stat()
+        return (st.st_mtime_ns, st.st_size)
+
+    # Load the artifact if it changed on disk (or always, with force=True).
+    # Returns True when a new version was swapped in.
+    def reload(self, force=False):
+        with self._lock:
+            try:
+                signature = self._stat()
+                if not force and signature == self._signature:
+                    return False
+                loaded = load_artifact(self.path)
+            except Exception as exc:
+                logger.error(f"Model reload from {self.path} failed, keeping {self.current.version}: {exc}")
+                return False
+            self._signature = signature
+            if loaded.version == self.current.version:
+                return False
+            previous, self.current = self.current.version, loaded
+            logger.info(f"🔄 Model swapped {previous} -> {loaded.version}")
+            return True
+
+    # Current model, re-checking the file at most every check_interval seconds.
+    # For callers that may block (Celery tasks); the API uses watch() instead.
+    def get(self):
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            self.reload()
+        return self.current
+
+    # Background poller for the event loop: loads off-thread, swaps in place
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await asyncio.to_thread(self.reload)
+
+
+if __name__ == "__main__":
+    # python -m src.api.model_registry [path]: export coefficients for fast API startup
+    import sys
+    path = Path(sys.argv[1]) if len(sys.argv) > 1 else MODEL_PATH
+    version = export_scorer(path)
+    if version is None:
+        print(f"Model at {path} is not linear; nothing to export (the API unpickles it at startup)")
+    else:
+        print(f"✅ Exported scorer for model {version} to {path.with_suffix('.json')}")
@@ -1,11 +1,17 @@
-from sqlalchemy import Column, Integer, Float, String, DateTime
+from sqlalchemy import Column, Integer, Float, String, Date, DateTime, Uuid, Index, DDL, event
 from datetime import datetime
+import uuid
 from .database import Base
 
+# On Postgres the table is range-partitioned by day on created_at (partitions
+# are managed by src/analysis/log_retention.py), so the partition key is part
+# of the primary key. Other databases get a plain table.
 class PredictionLog(Base):
     __tablename__ = "prediction_logs"
 
-    id = Column(Integer, primary_key=True, index=True)
+    # Client-generated so the API can return it before the row is written
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
 
     avg_payment_delay = Column(Float)
     max_payment_delay = Column(Float)
@@ -26,5 +32,63 @@ class PredictionLog(Base):
 
     default_probability = Column(Float)
     risk_category = Column(String)
+    model_version = Column(String)
 
-    created_at = Column(DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        # Keyset order for incremental readers (fairness monitor watermark)
+        Index("ix_prediction_logs_created_at_id", "created_at", "id"),
+        # Time-range scans (audits, rollups); a few pages per partition since rows arrive in time order
+        Index("ix_prediction_logs_created_at_brin", "created_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (created_at)"}
+    )
+
+# Catch-all partition, so an insert never fails for lack of a daily partition
+event.listen(
+    PredictionLog.__table__, "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS prediction_logs_default PARTITION OF prediction_logs DEFAULT").execute_if(dialect="postgresql")
+)
+
+
+# Running per-group totals of production predictions, one row per
+# (hour, model version, dimension, group); see src/analysis/fairness_monitor.py
+class FairnessStat(Base):
+    __tablename__ = "fairness_stats"
+
+    window_start = Column(DateTime, primary_key=True)
+    model_version = Column(String, primary_key=True)
+    dimension = Column(String, primary_key=True)    # income_band / age_group
+    group_value = Column(String, primary_key=True)
+
+    predictions = Column(Integer, nullable=False, default=0)
+    probability_sum = Column(Float, nullable=False, default=0.0)
+    approvals = Column(Integer, nullable=False, default=0)
+
+
+# Last (created_at, id) an incremental job has consumed
+class Watermark(Base):
+    __tablename__ = "watermarks"
+
+    name = Column(String, primary_key=True)
+    created_at = Column(DateTime)
+    log_id = Column(Uuid)
+
+
+# Daily pre-aggregates of prediction_logs that outlive the raw partitions:
+# one row per (day, model version, risk category, probability decile)
+class PredictionRollup(Base):
+    __tablename__ = "prediction_rollups"
+
+    day = Column(Date, primary_key=True)
+    model_version = Column(String, primary_key=True)
+    risk_category = Column(String, primary_key=True)
+    probability_bucket = Column(Integer, primary_key=True)  # 0..9, width 0.1
+
+    predictions = Column(Integer, nullable=False, default=0)
+    probability_sum = Column(Float, nullable=False, default=0.0)
+
+
+# python -m src.api.models: create missing tables (e.g. a pre-deploy step with DB_CREATE_SCHEMA=0)
+if __name__ == "__main__":
+    from .database import engine
+    Base.metadata.create_all(bind=engine)
+    print("✅ Schema up to date")
@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from .connections import DB_POOL_TIMEOUT
+from .models import PredictionLog
+from .telemetry import LOG_FLUSH_LATENCY, LOG_FLUSH_ROWS, LOG_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 0.5
+# Longest a row normally waits between log() and commit: one flush interval
+# plus a flush that waits the full pool timeout for a connection. Readers that
+# follow created_at (fairness_monitor) treat younger rows as unsettled. Rows
+# held longer (queue backpressure, a slow or failing database) are counted as
+# prediction_log_rows_total{result="late"}.
+MAX_FLUSH_DELAY = FLUSH_INTERVAL + DB_POOL_TIMEOUT
+
+
+# Write-behind logger for PredictionLog rows.
+# Requests enqueue rows with a client-generated UUID and return immediately;
+# a background task flushes them in executemany batches when either
+# batch_size rows are pending or flush_interval seconds have passed.
+# The queue is bounded, so a slow database applies backpressure to callers
+# instead of growing memory without limit.
+class PredictionLogWriter:
+
+    def __init__(self, session_factory, max_pending=10000, batch_size=500, flush_interval=FLUSH_INTERVAL):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._queue = None
+        self._task = None
+        self.flushed = 0
+        self.dropped = 0
+
+    def start(self):
+        if self._task is None:
+            # Created here so the queue binds to the serving event loop
+            self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._task = asyncio.create_task(self._run())
+
+    # Drain everything still queued, then stop the flush loop
+    async def stop(self):
+        if self._task is None:
+            return
+        await self._queue.put(None)
+        await self._task
+        self._task = None
+
+    # Queue one row; returns its id without waiting for the database
+    async def log(self, row: dict):
+        row = {**row, "id": uuid.uuid4(), "created_at": datetime.utcnow()}
+        await self._queue.put(row)
+        LOG_QUEUE_DEPTH.inc()
+        return row["id"]
+
+    async def log_many(self, rows: list):
+        return [await self.log(row) for row in rows]
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            row = await self._queue.get()
+            if row is None:
+                break
+            batch = [row]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    row = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list):
+        LOG_QUEUE_DEPTH.dec(len(batch))
+        start = time.perf_counter()
+        try:
+            async with self.session_factory() as db:
+                await db.execute(insert(PredictionLog), batch)
+                await db.commit()
+            self.flushed += len(batch)
+            LOG_FLUSH_ROWS.labels("flushed").inc(len(batch))
+            cutoff = datetime.utcnow() - timedelta(seconds=MAX_FLUSH_DELAY)
+            late = sum(row["created_at"] < cutoff for row in batch)
+            if late:
+                LOG_FLUSH_ROWS.labels("late").inc(late)
+                logger.warning(f"{late} prediction log rows committed more than {MAX_FLUSH_DELAY:.0f}s after creation")
+        except Exception as exc:
+            self.dropped += len(batch)
+            LOG_FLUSH_ROWS.labels("dropped").inc(len(batch))
+            logger.error(f"Prediction log flush failed, dropped {len(batch)} rows: {exc}")
+        finally:
+            LOG_FLUSH_LATENCY.observe(time.perf_counter() - start)
@@ -1,7 +1,4 @@
-import redis
+from .connections import sync_redis
 
-redis_client = redis.Redis(
-    host="redis",   # docker service name
-    port=6379,
-    decode_responses=True
-)
+# Blocking client for Celery tasks and scripts (shared pool, see connections.py)
+redis_client = sync_redis
@@ -0,0 +1,143 @@
+import math
+import numpy as np
+
+# Column order the model was trained on (see src/modeling/save_model.py)
+FEATURE_COLUMNS = [
+    "avg_payment_delay",
+    "max_payment_delay",
+    "std_payment_delay",
+    "avg_payment_ratio",
+    "min_payment_ratio",
+    "avg_utilization",
+    "max_utilization",
+    "income_low",
+    "income_medium",
+    "age_18_25",
+    "age_26_35",
+    "age_36_50"
+]
+
+# Map a default probability to the API risk bucket
+def risk_category(probability: float):
+    return (
+        "High Risk" if probability > 0.7
+        else "Medium Risk" if probability > 0.3
+        else "Low Risk"
+    )
+
+# Vectorized risk_category for an array of probabilities
+def risk_categories(probabilities):
+    probabilities = np.asarray(probabilities)
+    return np.select(
+        [probabilities > 0.7, probabilities > 0.3],
+        ["High Risk", "Medium Risk"],
+        default="Low Risk"
+    )
+
+# Stack a list of feature dicts into a (n_rows, n_features) matrix
+def to_matrix(rows: list):
+    return np.array(
+        [[row[col] for col in FEATURE_COLUMNS] for row in rows],
+        dtype=np.float64
+    ).reshape(len(rows), len(FEATURE_COLUMNS))
+
+
+# Plain-Python/NumPy scorer compiled from a fitted binary LogisticRegression.
+# Skips the DataFrame build and sklearn input validation on the hot path.
+class CompiledScorer:
+
+    def __init__(self, feature_names, coef, intercept):
+        self.feature_names = list(feature_names)
+        self.coef = np.asarray(coef, dtype=np.float64).ravel()
+        self.intercept = float(intercept)
+        self._weights = list(zip(self.feature_names, self.coef.tolist()))
+
+    @classmethod
+    def from_model(cls, model, check=True):
+        scorer = cls(model.feature_names_in_, model.coef_[0], model.intercept_[0])
+        if check:
+            scorer.check_against(model)
+        return scorer
+
+    # Single applicant: dict keyed by feature name, or a sequence in feature_names order
+    def predict_one(self, features):
+        z = self.intercept
+        if isinstance(features, dict):
+            for name, weight in self._weights:
+                z += weight * features[name]
+        else:
+            for value, (_, weight) in zip(features, self._weights):
+                z += weight * value
+        if z >= 0:
+            return 1.0 / (1.0 + math.exp(-z))
+        e = math.exp(z)
+        return e / (1.0 + e)
+
+    # Many applicants: (n_rows, n_features) matrix -> probabilities
+    def predict_many(self, X):
+        z = np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+        out = np.empty_like(z)
+        pos = z >= 0
+        out[pos] = 1.0 / (1.0 + np.exp(-z[pos]))
+        e = np.exp(z[~pos])
+        out[~pos] = e / (1.0 + e)
+        return out
+
+    # Equivalence check against predict_proba on deterministic probe rows
+    def check_against(self, model, n_rows=64, atol=1e-9):
+        rng = np.random.default_rng(0)
+        X = rng.normal(0.0, 3.0, size=(n_rows, len(self.feature_names)))
+        import pandas as pd
+        expected = model.predict_proba(pd.DataFrame(X, columns=self.feature_names))[:, 1]
+
+        many = self.predict_many(X)
+        one = np.array([self.predict_one(row) for row in X.tolist()])
+        if not (np.allclose(many, expected, rtol=0, atol=atol)
+                and np.allclose(one, expected, rtol=0, atol=atol)):
+            raise ValueError("CompiledScorer does not match model.predict_proba")
+
+
+# Fallback for artifacts without coefficients (tree ensembles picked by
+# src.modeling.model_search): same interface as CompiledScorer, backed by the
+# estimator's predict_proba. Needs sklearn at load time and has no explainer.
+class ModelScorer:
+
+    def __init__(self, model):
+        self.model = model
+        self.feature_names = list(model.feature_names_in_)
+
+    def predict_one(self, features):
+        row = [features[name] for name in self.feature_names] if isinstance(features, dict) else list(features)
+        return float(self.predict_many([row])[0])
+
+    def predict_many(self, X):
+        import pandas as pd
+        X = np.asarray(X, dtype=np.float64).reshape(-1, len(self.feature_names))
+        return self.model.predict_proba(pd.DataFrame(X, columns=self.feature_names))[:, 1]
+
+
+# Closed-form SHAP values for a linear model with an independent background
+# (what shap.LinearExplainer computes): contribution_j = coef_j * (x_j - mean_j)
+# in log-odds, and base_value is the log-odds at the background mean, so
+# base_value + sum(contributions) is the applicant's log-odds.
+class CompiledExplainer:
+
+    def __init__(self, scorer: CompiledScorer, background_means: dict):
+        self.feature_names = scorer.feature_names
+        self.coef = scorer.coef
+        self.means = np.array([background_means[name] for name in self.feature_names], dtype=np.float64)
+        self.base_value = float(self.means @ self.coef + scorer.intercept)
+
+    # (n_rows, n_features) matrix -> (n_rows, n_features) contributions
+    def explain_many(self, X):
+        return (np.asarray(X, dtype=np.float64) - self.means) * self.coef
+
+    # Contributions keyed by feature, plus the biggest drivers (by magnitude) first
+    def to_dict(self, contributions, top=3):
+        values = contributions.tolist()
+        order = np.argsort(-np.abs(contributions), kind="stable")[:top]
+        return {
+            "base_value": self.base_value,
+            "contributions": dict(zip(self.feature_names, values)),
+            "top_drivers": [self.feature_names[i] for i in order]
+        }
@@ -1,25 +1,207 @@
 from .celery_worker import celery_app
-import pandas as pd
-import joblib
+import io
+import shutil
+import threading
 from pathlib import Path
+from celery import chord
+from .scoring import FEATURE_COLUMNS, risk_category, risk_categories
+from .model_registry import ModelRegistry, PROJECT_ROOT
+from .batcher import ThreadedMicroBatcher
+from .redis_client import redis_client
 
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-MODEL_PATH = PROJECT_ROOT / "models" / "credit_risk_model.pkl"
-model = joblib.load(MODEL_PATH)
+# Not loaded at import: the API imports this module only to submit tasks.
+# The Celery worker preloads it from its worker_init hook (celery_worker.py)
+# and freezes the heap before forking, so prefork children share the parent's
+# copy; other callers load it on first use.
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry():
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+    return _registry
+
+# Coalesces concurrent tasks when the worker runs a threaded pool. A prefork
+# (or solo) child runs one task at a time, so nothing could ever join a batch:
+# there predict_async scores directly instead of waiting out the window.
+batcher = ThreadedMicroBatcher(lambda: get_registry().get())
+_batching = False
+
+# Set by celery_worker's worker_init hook from the worker's pool type
+def use_batching(enabled: bool):
+    global _batching
+    _batching = enabled
+
+DATA_DIR = PROJECT_ROOT / "data"
+BULK_OUTPUT_DIR = DATA_DIR / "scored"
+BULK_JOB_TTL = 7 * 24 * 3600
 
 @celery_app.task(name="src.api.tasks.predict_async")
 def predict_async(features: dict):
 
-    df = pd.DataFrame([features])
-    probability = model.predict_proba(df)[0][1]
-
-    risk_category = (
-        "High Risk" if probability > 0.7
-        else "Medium Risk" if probability > 0.3
-        else "Low Risk"
-    )
+    # registry.get() picks up a retrained artifact without a worker restart
+    if _batching:
+        probability, version = batcher.predict(features)
+    else:
+        current = get_registry().get()
+        probability, version = current.scorer.predict_one(features), current.version
 
     return {
         "default_probability": float(probability),
-        "risk_category": risk_category
+        "risk_category": risk_category(probability),
+        "model_version": version
     }
+
+# -----------------------------
+# Bulk file scoring
+# -----------------------------
+# Bulk jobs read CSV files from anywhere under data/ (split_csv slices the
+# raw text, so a Parquet file would only fail later, inside the chord) ...
+def resolve_data_path(path):
+    resolved = (PROJECT_ROOT / path).resolve()
+    if not resolved.is_relative_to(DATA_DIR.resolve()):
+        raise ValueError(f"{path} is outside {DATA_DIR}")
+    if resolved.suffix != ".csv":
+        raise ValueError(f"{path} must be a .csv file")
+    return resolved
+
+# ... but only write new files under data/scored/, so a request can never
+# overwrite raw or processed tables
+def resolve_output_path(path):
+    resolved = (PROJECT_ROOT / path).resolve()
+    if not resolved.is_relative_to(BULK_OUTPUT_DIR.resolve()):
+        raise ValueError(f"{path} is outside {BULK_OUTPUT_DIR}")
+    if resolved.suffix not in (".csv", ".parquet"):
+        raise ValueError(f"{path} must end in .csv or .parquet")
+    if resolved.exists():
+        raise ValueError(f"{path} already exists")
+    return resolved
+
+def bulk_job_key(job_id: str):
+    return f"bulk:{job_id}"
+
+# One pass over the raw bytes: header line plus (start, end) byte ranges of
+# chunk_size rows each, so workers can seek straight to their slice
+def split_csv(path, chunk_size):
+    ranges, total_rows = [], 0
+    with open(path, "rb") as f:
+        header = f.readline()
+        while header and not header.strip():  # tolerate leading blank lines
+            header = f.readline()
+        pos = start = f.tell()
+        rows = 0
+        for line in f:
+            pos += len(line)
+            if line.strip():
+                rows += 1
+                if rows == chunk_size:
+                    ranges.append((start, pos))
+                    total_rows += rows
+                    start, rows = pos, 0
+        if rows:
+            ranges.append((start, pos))
+            total_rows += rows
+    return header, ranges, total_rows
+
+# Split the file into row ranges and fan them out as a chord;
+# progress lives in the Redis hash bulk:<job_id>
+@celery_app.task(bind=True, name="src.api.tasks.score_file")
+def score_file(self, input_path: str, output_path: str = None, chunk_size: int = 50000):
+    job_id = self.request.id
+    source = resolve_data_path(input_path)
+    target = resolve_output_path(output_path or BULK_OUTPUT_DIR / f"{job_id}.csv")
+    parts_dir = target.parent / f".{job_id}.parts"
+    parts_dir.mkdir(parents=True, exist_ok=True)
+
+    header, ranges, total_rows = split_csv(source, chunk_size)
+
+    key = bulk_job_key(job_id)
+    redis_client.hset(key, mapping={
+        "status": "RUNNING",
+        "rows": total_rows,
+        "total_chunks": len(ranges),
+        "done_chunks": 0,
+        "output_path": str(target)
+    })
+    redis_client.expire(key, BULK_JOB_TTL)
+
+    chunks = [
+        score_chunk.s(job_id, str(source), header.decode(), start, end, str(parts_dir / f"part-{i:05d}.csv"))
+        for i, (start, end) in enumerate(ranges)
+    ]
+    callback = merge_chunks.s(job_id, str(target), str(parts_dir)).on_error(mark_bulk_failed.s(job_id=job_id))
+    chord(chunks)(callback)
+    return {"job_id": job_id, "rows": total_rows, "chunks": len(ranges)}
+
+# Score one byte range with a single vectorized pass
+@celery_app.task(name="src.api.tasks.score_chunk")
+def score_chunk(job_id: str, input_path: str, header: str, start: int, end: int, part_path: str):
+    import pandas as pd
+    with open(input_path, "rb") as f:
+        f.seek(start)
+        chunk = pd.read_csv(io.BytesIO(header.encode() + f.read(end - start)))
+    current = get_registry().get()
+    probabilities = current.scorer.predict_many(chunk[FEATURE_COLUMNS].to_numpy(dtype=float))
+
+    scored = pd.DataFrame({
+        "default_probability": probabilities,
+        "risk_category": risk_categories(probabilities),
+        "model_version": current.version
+    })
+    if "user_id" in chunk.columns:
+        scored.insert(0, "user_id", chunk["user_id"].to_numpy())
+    scored.to_csv(part_path, index=False)
+
+    redis_client.hincrby(bulk_job_key(job_id), "done_chunks", 1)
+    return part_path
+
+# Concatenate the part files in chunk order, one part in memory at a time
+# (CSV byte-copied, Parquet appended as one row group per part)
+@celery_app.task(name="src.api.tasks.merge_chunks")
+def merge_chunks(part_paths: list, job_id: str, output_path: str, parts_dir: str):
+    target = Path(output_path)
+    if target.suffix == ".parquet":
+        import pyarrow as pa
+        import pyarrow.csv as pv
+        import pyarrow.parquet as pq
+        # A hex model version of only digits must not be inferred as a number
+        convert = pv.ConvertOptions(column_types={"model_version": pa.string(), "risk_category": pa.string()})
+        writer = None
+        try:
+            for part in part_paths:
+                table = pv.read_csv(part, convert_options=convert)
+                if writer is None:
+                    writer = pq.ParquetWriter(target, table.schema)
+                writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+    else:
+        with open(target, "wb") as out:
+            for i, part in enumerate(part_paths):
+                with open(part, "rb") as f:
+                    if i > 0:
+                        f.readline()  # header already written
+                    shutil.copyfileobj(f, out)
+    shutil.rmtree(parts_dir, ignore_errors=True)
+
+    redis_client.hset(bulk_job_key(job_id), "status", "SUCCESS")
+    return {"job_id": job_id, "output_path": output_path}
+
+@celery_app.task(name="src.api.tasks.mark_bulk_failed")
+def mark_bulk_failed(request, exc, traceback, job_id: str):
+    redis_client.hset(bulk_job_key(job_id), mapping={"status": "FAILURE", "error": str(exc)})
+
+# Periodic fairness monitoring (celery beat): fold new prediction logs into per-group stats
+@celery_app.task(name="src.api.tasks.update_fairness_stats")
+def update_fairness_stats():
+    from src.analysis.fairness_monitor import update_fairness_stats as run
+    return {"processed": run()}
+
+# Hourly (celery beat): next days' partitions, daily rollups, archive + drop expired days
+@celery_app.task(name="src.api.tasks.maintain_prediction_logs")
+def maintain_prediction_logs():
+    from src.analysis.log_retention import maintain_prediction_logs as run
+    return run()
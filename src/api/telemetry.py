@@ -0,0 +1,124 @@
+import json
+import logging
+import os
+import random
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+)
+
+# -----------------------------
+# Prometheus metrics
+# -----------------------------
+# With several processes (gunicorn workers, Celery prefork) set
+# PROMETHEUS_MULTIPROC_DIR to a shared empty directory; scrapes then
+# aggregate every process's samples.
+MULTIPROC_DIR = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+
+# Stage timings sit in the tens of microseconds to milliseconds
+STAGE_BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0
+)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency",
+    ["method", "route", "status"], buckets=STAGE_BUCKETS
+)
+PREDICT_STAGE_LATENCY = Histogram(
+    "predict_stage_duration_seconds", "Latency of each stage of a prediction request",
+    ["endpoint", "stage"], buckets=STAGE_BUCKETS
+)
+CACHE_REQUESTS = Counter(
+    "prediction_cache_requests_total", "Prediction cache lookups by tier and result",
+    ["tier", "result"]
+)
+LOG_FLUSH_LATENCY = Histogram(
+    "prediction_log_flush_duration_seconds", "Write-behind prediction log flush latency (one executemany + commit)"
+)
+LOG_FLUSH_ROWS = Counter("prediction_log_rows_total", "Prediction log rows by outcome", ["result"])
+LOG_QUEUE_DEPTH = Gauge(
+    "prediction_log_queue_depth", "Prediction log rows waiting to be flushed", multiprocess_mode="livesum"
+)
+CELERY_QUEUE_DEPTH = Gauge(
+    "celery_queue_depth", "Messages waiting in the Celery broker queue", ["queue"], multiprocess_mode="max"
+)
+CELERY_TASK_RUNTIME = Histogram(
+    "celery_task_duration_seconds", "Celery task runtime", ["task", "state"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections", "Database connections currently checked out of the pool",
+    ["engine"], multiprocess_mode="livesum"
+)
+DB_POOL_CONNECTIONS_OPENED = Counter(
+    "db_pool_connections_opened_total", "New database connections opened by the pool", ["engine"]
+)
+REDIS_POOL_CONNECTIONS = Gauge(
+    "redis_pool_connections", "Redis pool connections by state", ["client", "state"], multiprocess_mode="livesum"
+)
+MODEL_LOAD_SECONDS = Histogram(
+    "model_load_duration_seconds", "Time to read, unpickle and verify a model artifact",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+# Pre-bound children for the hot path (labels() is a dict lookup per call)
+def stage_timers(endpoint: str, stages: list):
+    return {stage: PREDICT_STAGE_LATENCY.labels(endpoint, stage) for stage in stages}
+
+CACHE_L1_HIT = CACHE_REQUESTS.labels("l1", "hit")
+CACHE_L1_MISS = CACHE_REQUESTS.labels("l1", "miss")
+CACHE_L2_HIT = CACHE_REQUESTS.labels("l2", "hit")
+CACHE_L2_MISS = CACHE_REQUESTS.labels("l2", "miss")
+
+
+def metrics_registry():
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+def render_metrics():
+    return generate_latest(metrics_registry()), CONTENT_TYPE_LATEST
+
+# Drop a finished worker's live gauges (livesum) from the multiprocess totals
+def mark_process_dead(pid: int):
+    if MULTIPROC_DIR:
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
+
+
+# -----------------------------
+# Structured, sampled request logging
+# -----------------------------
+# One JSON object per line. Only a LOG_SAMPLE_RATE share of ordinary requests
+# is logged; errors and requests slower than LOG_SLOW_MS always are.
+LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.01"))
+LOG_SLOW_MS = float(os.getenv("LOG_SLOW_MS", "250"))
+
+
+class JsonFormatter(logging.Formatter):
+
+    def format(self, record):
+        entry = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage()
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=logging.INFO):
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter())
+    logging.basicConfig(level=level, handlers=[handler], force=True)
+
+
+def should_log(status: int, duration_ms: float):
+    return status >= 500 or duration_ms >= LOG_SLOW_MS or random.random() < LOG_SAMPLE_RATE
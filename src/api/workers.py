@@ -0,0 +1,51 @@
+import gc
+import math
+import os
+from pathlib import Path
+
+# -----------------------------
+# Multi-process serving helpers
+# -----------------------------
+# Shared by gunicorn.conf.py (API) and celery_worker.py (prefork pool). Kept
+# free of heavy imports: gunicorn loads this before the app is imported.
+
+
+# CPUs this container may actually use: the scheduler affinity mask, capped by
+# a cgroup v2 CPU quota (os.cpu_count() reports the host's CPUs)
+def available_cpus():
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+# Process count from env_var, else one per available CPU (scoring is CPU-bound
+# and each worker runs its own event loop, so more would only contend)
+def worker_count(env_var: str):
+    return int(os.getenv(env_var) or available_cpus())
+
+# Run in the parent once the app and model are loaded, right before forking.
+# Moves everything allocated so far out of the collector's generations, so a
+# child's GC passes never write to (and un-share) the parent's pages.
+def freeze_heap():
+    gc.collect()
+    gc.freeze()
+
+# prometheus_client picks its multiprocess backend at import time, so the
+# directory has to exist (and be emptied of a previous run's files) first.
+# Only the *.db sample files are removed; nothing else in the directory is touched.
+def prepare_multiproc_dir():
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if not path:
+        return
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    for db in path.glob("*.db"):
+        if db.is_file():
+            db.unlink()
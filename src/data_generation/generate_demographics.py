@@ -1,105 +1,101 @@
+import argparse
 import pandas as pd
 import numpy as np
-from pathlib import Path
 
-np.random.seed(42)
+from src.storage import read_table, write_table, table_paths
 
-# -----------------------------
-# Paths
-# -----------------------------
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DATA_RAW = PROJECT_ROOT / "data" / "raw"
-DATA_RAW.mkdir(parents=True, exist_ok=True)
+INCOME_BANDS = ["low", "medium", "high"]
+AGE_GROUPS = ["18-25", "26-35", "36-50", "51+"]
+GENDERS = ["male", "female"]
+
+# Sampling probabilities by default status: (non-defaulter, defaulter)
+INCOME_P = (
+    [0.15, 0.40, 0.45],  # Non-defaulters more likely to be higher income
+    [0.60, 0.30, 0.10]   # Defaulters more likely to be low income (60% low, 30% medium, 10% high)
+)
+AGE_P = (
+    [0.15, 0.30, 0.35, 0.20],
+    [0.30, 0.35, 0.25, 0.10]  # younger people slightly more risky
+)
 
-# Load existing data
-users = pd.read_csv(DATA_RAW / "users.csv")
-cards = pd.read_csv(DATA_RAW / "credit_cards.csv")
-payments = pd.read_csv(DATA_RAW / "payments.csv")
-billing = pd.read_csv(DATA_RAW / "billing_cycles.csv")
 
 # -----------------------------
 # Calculate user-level default rate from payments
 # -----------------------------
-# Merge to get defaults by card
-card_defaults = (
-    payments
-    .merge(billing[["billing_cycle_id", "card_id"]], on="billing_cycle_id")
-    .groupby("card_id")["default_flag"]
-    .mean()
-    .reset_index()
-    .rename(columns={"default_flag": "default_rate"})
-)
+def user_default_flags():
+    cards = read_table("credit_cards", columns=["card_id", "user_id"])
+    payments = read_table("payments", columns=["billing_cycle_id", "default_flag"])
+    billing = read_table("billing_cycles", columns=["billing_cycle_id", "card_id"])
 
-# Merge with users through cards
-user_defaults = (
-    cards[["card_id", "user_id"]]
-    .merge(card_defaults, on="card_id")
-    .groupby("user_id")["default_rate"]
-    .mean()
-    .reset_index()
-)
+    # Merge to get defaults by card
+    card_defaults = (
+        payments
+        .merge(billing, on="billing_cycle_id")
+        .groupby("card_id")["default_flag"]
+        .mean()
+        .rename("default_rate")
+        .reset_index()
+    )
+
+    # Merge with users through cards
+    user_defaults = (
+        cards
+        .merge(card_defaults, on="card_id")
+        .groupby("user_id")["default_rate"]
+        .mean()
+        .reset_index()
+    )
+
+    # Create binary default flag: user defaulted if default_rate > 15%
+    user_defaults["default_flag"] = (user_defaults["default_rate"] > 0.15).astype(int)
+    return user_defaults
+
+
+# Draw one category per row, with the probability vector chosen by group (0/1)
+def _sample_by_group(rng, group, categories, probabilities):
+    codes = np.empty(len(group), dtype=np.int64)
+    for g, p in enumerate(probabilities):
+        mask = group == g
+        codes[mask] = rng.choice(len(categories), mask.sum(), p=p)
+    return pd.Categorical.from_codes(codes, categories)
 
-# Create binary default flag: user defaulted if defauwlt_rate > 30%
-user_defaults["default_flag"] = (user_defaults["default_rate"] > 0.15).astype(int)
 
 # -----------------------------
 # Generate demographics CORRELATED with defaults
 # -----------------------------
-demographics = []
-
-for _, row in user_defaults.iterrows():
-    user_id = row["user_id"]
-    is_defaulter = row["default_flag"]
-    
-    # Income is correlated with default risk
-    if is_defaulter:
-        # Defaulters more likely to be low income
-        income_band = np.random.choice(
-            ["low", "medium", "high"],
-            p=[0.60, 0.30, 0.10]  # 60% low, 30% medium, 10% high
-        )
-    else:
-        # Non-defaulters more likely to be higher income
-        income_band = np.random.choice(
-            ["low", "medium", "high"],
-            p=[0.15, 0.40, 0.45]  # 15% low, 40% medium, 45% high
-        )
-    
-    # Age group - younger people slightly more risky
-    if is_defaulter:
-        age_group = np.random.choice(
-            ["18-25", "26-35", "36-50", "51+"],
-            p=[0.30, 0.35, 0.25, 0.10]
-        )
-    else:
-        age_group = np.random.choice(
-            ["18-25", "26-35", "36-50", "51+"],
-            p=[0.15, 0.30, 0.35, 0.20]
-        )
-    
-    # Gender - keep it neutral (no discrimination)
-    gender = np.random.choice(["male", "female"])
-    
-    demographics.append({
-        "user_id": user_id,
-        "age_group": age_group,
-        "gender": gender,
-        "income_band": income_band,
+def generate_demographics(seed=42):
+    rng = np.random.default_rng(seed)
+    user_defaults = user_default_flags()
+    is_defaulter = user_defaults["default_flag"].to_numpy()
+
+    return pd.DataFrame({
+        "user_id": user_defaults["user_id"],
+        "age_group": _sample_by_group(rng, is_defaulter, AGE_GROUPS, AGE_P),
+        # Gender - keep it neutral (no discrimination)
+        "gender": pd.Categorical.from_codes(rng.integers(0, len(GENDERS), len(is_defaulter)), GENDERS),
+        "income_band": _sample_by_group(rng, is_defaulter, INCOME_BANDS, INCOME_P),
         "default_flag": is_defaulter
     })
 
-demographics = pd.DataFrame(demographics)
 
-# -----------------------------
-# Save
-# -----------------------------
-demographics.to_csv(DATA_RAW / "demographics.csv", index=False)
-
-print(f"Demographics generated successfully at:")
-print(f"{DATA_RAW / 'demographics.csv'}")
-print(f"\nDefault rate by income band:")
-print(demographics.groupby("income_band")["default_flag"].mean())
-print(f"\nDefault rate by age group:")
-print(demographics.groupby("age_group")["default_flag"].mean())
-print(f"\nDefault rate by gender:")
-print(demographics.groupby("gender")["default_flag"].mean())
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate demographics correlated with payment defaults")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--no-csv", action="store_true", help="write Parquet only, skip the CSV export")
+    args = parser.parse_args()
+
+    demographics = generate_demographics(args.seed)
+
+    # -----------------------------
+    # Save
+    # -----------------------------
+    write_table(demographics, "demographics", csv=not args.no_csv)
+
+    print(f"Demographics generated successfully at:")
+    print(f"{table_paths('demographics')[0]}")
+    print(f"\nDefault rate by income band:")
+    print(demographics.groupby("income_band", observed=True)["default_flag"].mean())
+    print(f"\nDefault rate by age group:")
+    print(demographics.groupby("age_group", observed=True)["default_flag"].mean())
+    print(f"\nDefault rate by gender:")
+    print(demographics.groupby("gender", observed=True)["default_flag"].mean())
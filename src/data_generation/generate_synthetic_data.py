@@ -1,221 +1,246 @@
-import pandas as pd
+import argparse
+import shutil
+from contextlib import ExitStack
 import numpy as np
-from datetime import date, timedelta
-from pathlib import Path
+import pandas as pd
+import pyarrow.parquet as pq
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
 
-np.random.seed(42)
+from src.storage import TableWriter, DATA_RAW
 
 # -----------------------------
-# Paths (robust)
+# Distributions (unchanged from the original generator)
 # -----------------------------
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DATA_RAW = PROJECT_ROOT / "data" / "raw"
-DATA_RAW.mkdir(parents=True, exist_ok=True)
+CREDIT_LIMITS = [50000, 100000, 200000]
+
+MERCHANT_CATEGORIES = [
+    "groceries", "fuel", "rent", "utilities",
+    "entertainment", "travel", "shopping", "food_delivery"
+]
+TXN_AMOUNTS = [100, 200, 500, 1000, 2000, 5000]
+TXN_AMOUNT_P = [0.2, 0.25, 0.25, 0.15, 0.1, 0.05]
+TXN_TYPES = ["online", "in_store"]
+TXN_TYPE_P = [0.6, 0.4]
+
+# 20% high risk, 30% medium risk, 50% low risk
+RISK_PROFILES = ["high_risk", "medium_risk", "low_risk"]
+RISK_P = [0.2, 0.3, 0.5]
+
+# Payment timing (days after due date) by risk profile
+DAYS_OFFSET = {
+    "high_risk": ([-5, 0, 5, 15, 30, 60, 120], [0.05, 0.10, 0.15, 0.20, 0.25, 0.15, 0.10]),  # often late, sometimes very late
+    "medium_risk": ([-5, 0, 5, 15, 30], [0.10, 0.30, 0.30, 0.20, 0.10]),                     # sometimes late
+    "low_risk": ([-5, 0, 5], [0.30, 0.60, 0.10])                                             # usually on time
+}
+
+PARTS_DIR = DATA_RAW / ".parts"
+TABLE_NAMES = ["users", "credit_cards", "billing_cycles", "transactions", "payments"]
+
+
+def _ids(prefix, numbers):
+    return prefix + pd.Series(numbers).astype(str)
+
+def _days(dates, offsets):
+    return dates - offsets.astype("timedelta64[D]")
+
 
 # -----------------------------
 # USERS TABLE
 # -----------------------------
-users = pd.DataFrame({
-    "user_id": [f"user_{i}" for i in range(1, 21)],
-    "account_open_date": [
-        date.today() - timedelta(days=np.random.randint(300, 2000))
-        for _ in range(20)
-    ],
-    "account_status": ["active"] * 20
-})
+def make_users(rng, user_lo, user_hi, today):
+    n = user_hi - user_lo
+    return pd.DataFrame({
+        "user_id": _ids("user_", np.arange(user_lo, user_hi) + 1),
+        "account_open_date": _days(today, rng.integers(300, 2000, n)),
+        "account_status": "active"
+    })
 
 # -----------------------------
 # CREDIT CARDS TABLE
 # -----------------------------
-cards = pd.DataFrame({
-    "card_id": [f"card_{i}" for i in range(1, 31)],
-    "user_id": np.random.choice(users["user_id"], 30),
-    "credit_limit": np.random.choice([50000, 100000, 200000], 30),
-    "interest_rate": np.random.uniform(12, 36, 30).round(2),
-    "card_open_date": [
-        date.today() - timedelta(days=np.random.randint(200, 1500))
-        for _ in range(30)
-    ],
-    "card_status": ["active"] * 30
-})
+def make_cards(rng, card_lo, card_hi, user_lo, user_hi, today):
+    n = card_hi - card_lo
+    return pd.DataFrame({
+        "card_id": _ids("card_", np.arange(card_lo, card_hi) + 1),
+        "user_id": _ids("user_", rng.integers(user_lo, user_hi, n) + 1),
+        "credit_limit": rng.choice(CREDIT_LIMITS, n),
+        "interest_rate": rng.uniform(12, 36, n).round(2),
+        "card_open_date": _days(today, rng.integers(200, 1500, n)),
+        "card_status": "active"
+    })
 
 # -----------------------------
 # BILLING CYCLES
 # -----------------------------
-billing_cycles = []
-
-for card in cards["card_id"]:
-    for m in range(6):
-        cycle_end = date.today().replace(day=1) - timedelta(days=30*m)
-        cycle_start = cycle_end - timedelta(days=30)
-
-        total_due = np.random.randint(1000, 30000)
-        minimum_due = int(total_due * np.random.uniform(0.05, 0.15))  # 5-15% of total
-        billing_cycles.append({
-            "billing_cycle_id": f"{card}_{m}",
-            "card_id": card,
-            "cycle_start_date": cycle_start,
-            "cycle_end_date": cycle_end,
-            "statement_date": cycle_end + timedelta(days=1),
-            "due_date": cycle_end + timedelta(days=21),
-            "total_due": total_due,
-            "minimum_due": minimum_due
-        })
-
-billing_cycles = pd.DataFrame(billing_cycles)
+def make_billing_cycles(rng, card_ids, months, today):
+    n = len(card_ids) * months
+    m = np.tile(np.arange(months), len(card_ids))
+    card = np.repeat(card_ids.to_numpy(), months)
+
+    cycle_end = _days(np.datetime64(today.replace(day=1)), 30 * m)
+    total_due = rng.integers(1000, 30000, n)
+    return pd.DataFrame({
+        "billing_cycle_id": pd.Series(card) + "_" + pd.Series(m).astype(str),
+        "card_id": card,
+        "cycle_start_date": _days(cycle_end, np.full(n, 30)),
+        "cycle_end_date": cycle_end,
+        "statement_date": cycle_end + np.timedelta64(1, "D"),
+        "due_date": cycle_end + np.timedelta64(21, "D"),
+        "total_due": total_due,
+        "minimum_due": (total_due * rng.uniform(0.05, 0.15, n)).astype(np.int64)  # 5-15% of total
+    })
 
 # -----------------------------
 # TRANSACTIONS TABLE
 # -----------------------------
-transaction_rows = []
-
-merchant_categories = [
-    "groceries", "fuel", "rent", "utilities",
-    "entertainment", "travel", "shopping", "food_delivery"
-]
-
-for _, cycle in billing_cycles.iterrows():
-    num_txns = np.random.randint(10, 60)
-
-    for i in range(num_txns):
-        txn_date = cycle["cycle_start_date"] + timedelta(
-            days=np.random.randint(0, 30)
-        )
-
-        amount = np.random.choice(
-            [100, 200, 500, 1000, 2000, 5000],
-            p=[0.2, 0.25, 0.25, 0.15, 0.1, 0.05]
-        )
-
-        transaction_rows.append({
-            "transaction_id": f"txn_{cycle['billing_cycle_id']}_{i}",
-            "card_id": cycle["card_id"],
-            "transaction_date": txn_date,
-            "amount": amount,
-            "merchant_category": np.random.choice(merchant_categories),
-            "transaction_type": np.random.choice(["online", "in_store"], p=[0.6, 0.4])
-        })
-
-transactions = pd.DataFrame(transaction_rows)
+def make_transactions(rng, cycles):
+    num_txns = rng.integers(10, 60, len(cycles))
+    cycle = np.repeat(np.arange(len(cycles)), num_txns)
+    n = len(cycle)
+    # position of each transaction within its cycle
+    seq = np.arange(n) - np.repeat(np.cumsum(num_txns) - num_txns, num_txns)
+
+    cycle_ids = cycles["billing_cycle_id"].to_numpy()[cycle]
+    start = cycles["cycle_start_date"].to_numpy().astype("datetime64[D]")[cycle]
+    return pd.DataFrame({
+        "transaction_id": "txn_" + pd.Series(cycle_ids) + "_" + pd.Series(seq).astype(str),
+        "card_id": cycles["card_id"].to_numpy()[cycle],
+        "transaction_date": start + rng.integers(0, 30, n).astype("timedelta64[D]"),
+        "amount": rng.choice(TXN_AMOUNTS, n, p=TXN_AMOUNT_P),
+        "merchant_category": pd.Categorical.from_codes(rng.integers(0, len(MERCHANT_CATEGORIES), n), MERCHANT_CATEGORIES),
+        "transaction_type": pd.Categorical.from_codes(rng.choice(2, n, p=TXN_TYPE_P), TXN_TYPES)
+    })
 
 # -----------------------------
 # PAYMENTS TABLE WITH REALISTIC DEFAULTS
 # -----------------------------
-payment_rows = []
-
-# Assign risk profiles to cards (some cards will be riskier)
-card_risk_profile = {}
-for card in cards["card_id"].unique():
-    # 20% high risk, 30% medium risk, 50% low risk
-    card_risk_profile[card] = np.random.choice(
-        ["high_risk", "medium_risk", "low_risk"],
-        p=[0.2, 0.3, 0.5]
-    )
+def make_payments(rng, cycles, risk):
+    n = len(cycles)
+    min_due = cycles["minimum_due"].to_numpy()
+    total_due = cycles["total_due"].to_numpy()
+
+    days_offset = np.zeros(n, dtype=np.int64)
+    for profile, (offsets, p) in DAYS_OFFSET.items():
+        mask = risk == profile
+        days_offset[mask] = rng.choice(offsets, mask.sum(), p=p)
+
+    # Payment amount based on risk profile: pick a column of candidate amounts per row
+    high = risk == "high_risk"
+    medium = risk == "medium_risk"
+    low = risk == "low_risk"
+    amount = np.zeros(n)
+    candidates = np.column_stack([min_due * 0.8, min_due, min_due * 1.5, total_due])[high]  # less than / exactly / bit more than minimum, full
+    amount[high] = candidates[np.arange(len(candidates)), rng.choice(4, len(candidates), p=[0.15, 0.50, 0.30, 0.05])]
+    candidates = np.column_stack([min_due, total_due * 0.5, total_due])[medium]
+    amount[medium] = candidates[np.arange(len(candidates)), rng.choice(3, len(candidates), p=[0.30, 0.40, 0.30])]
+    candidates = np.column_stack([min_due, total_due])[low]  # usually pay in full
+    amount[low] = candidates[np.arange(len(candidates)), rng.choice(2, len(candidates), p=[0.20, 0.80])]
 
-for _, cycle in billing_cycles.iterrows():
-    card_id = cycle["card_id"]
-    risk = card_risk_profile[card_id]
-    
-    # Payment timing based on risk profile
-    if risk == "high_risk":
-        # Often late, sometimes very late
-        days_offset = int(np.random.choice(
-            [-5, 0, 5, 15, 30, 60, 120],
-            p=[0.05, 0.10, 0.15, 0.20, 0.25, 0.15, 0.10])
-        )
-    elif risk == "medium_risk":
-        # Sometimes late
-        days_offset = np.random.choice(
-            [-5, 0, 5, 15, 30],
-            p=[0.10, 0.30, 0.30, 0.20, 0.10]
-        )
-    else:  # low_risk
-        # Usually on time
-        days_offset = np.random.choice(
-            [-5, 0, 5],
-            p=[0.30, 0.60, 0.10]
-        )
-    
-    payment_date = cycle["due_date"] + timedelta(days=int(days_offset))
-    
-    min_due = int(cycle["minimum_due"])
-    total_due = int(cycle["total_due"])
-    
-    # Payment amount based on risk profile
-    if risk == "high_risk":
-        # Often pay only minimum or less
-        payment_choices = [
-            min_due * 0.8,  # Less than minimum
-            min_due,        # Exactly minimum
-            min_due * 1.5,  # Bit more than minimum
-            total_due       # Full payment (rare)
-        ]
-        payment_amount = int(np.random.choice(
-            payment_choices,
-            p=[0.15, 0.50, 0.30, 0.05]
-        ))
-    elif risk == "medium_risk":
-        payment_amount = int(np.random.choice(
-            [min_due, total_due * 0.5, total_due],
-            p=[0.30, 0.40, 0.30]
-        ))
-    else:  # low_risk
-        # Usually pay in full
-        payment_amount = int(np.random.choice(
-            [min_due, total_due],
-            p=[0.20, 0.80]
-        ))
-    
     # Ensure payment amount is positive and within reasonable bounds
-    payment_amount = max(0, min(payment_amount, total_due + 1000))
-    
-    payment_rows.append({
-        "payment_id": f"pay_{cycle['billing_cycle_id']}",
-        "billing_cycle_id": cycle["billing_cycle_id"],
-        "payment_date": payment_date,
+    payment_amount = np.clip(amount.astype(np.int64), 0, total_due + 1000)
+
+    days_late = days_offset  # payment_date - due_date
+    return pd.DataFrame({
+        "payment_id": "pay_" + cycles["billing_cycle_id"],
+        "billing_cycle_id": cycles["billing_cycle_id"],
+        "payment_date": cycles["due_date"].to_numpy().astype("datetime64[D]") + days_offset.astype("timedelta64[D]"),
         "payment_amount": payment_amount,
-        "payment_status": "completed"
+        "payment_status": "completed",
+        "days_late": days_late,
+        # Default: 90+ days late OR paid less than minimum due
+        "default_flag": ((days_late > 90) | (payment_amount < min_due)).astype(int)
     })
 
-payments = pd.DataFrame(payment_rows)
 
 # -----------------------------
-# ADD DEFAULT FLAGS
-# -----------------------------
-# Calculate days late for each payment
-payments["days_late"] = (
-    pd.to_datetime(payments["payment_date"]) - 
-    pd.to_datetime(billing_cycles.set_index("billing_cycle_id").loc[payments["billing_cycle_id"], "due_date"].values)
-).dt.days
-
-billing_min_due = billing_cycles.set_index("billing_cycle_id")["minimum_due"]
-
-# Determine default: 90+ days late OR paid less than minimum due
-payments["default_flag"] = (
-    (payments["days_late"] > 90) | 
-    (payments["payment_amount"] < billing_min_due.loc[payments["billing_cycle_id"]].values)
-).astype(int)
-# Get minimum due for each billing cycle
-billing_min_due = billing_cycles.set_index("billing_cycle_id")["minimum_due"]
-
-# Determine default: 90+ days late OR paid less than minimum due
-payments["default_flag"] = (
-    (payments["days_late"] > 90) | 
-    (payments["payment_amount"] < billing_min_due.loc[payments["billing_cycle_id"]].values)
-).astype(int)
+# One shard = a contiguous range of users and of cards
+# -----------------------------
+def generate_shard(spec):
+    rng = np.random.default_rng(spec["seed"])
+    today = np.datetime64(spec["as_of"])
+    as_of = date.fromisoformat(spec["as_of"])
+    parts = {name: PARTS_DIR / f"{name}-{spec['shard']:04d}.parquet" for name in TABLE_NAMES}
+
+    with TableWriter("users", path=parts["users"]) as out:
+        out.write(make_users(rng, spec["user_lo"], spec["user_hi"], today))
+
+    with ExitStack() as stack:
+        writers = {name: stack.enter_context(TableWriter(name, path=parts[name])) for name in TABLE_NAMES[1:]}
+        # Cards are processed in batches so memory stays bounded per process
+        for card_lo in range(spec["card_lo"], spec["card_hi"], spec["batch_cards"]):
+            card_hi = min(card_lo + spec["batch_cards"], spec["card_hi"])
+            cards = make_cards(rng, card_lo, card_hi, spec["user_lo"], spec["user_hi"], today)
+            # Assign risk profiles to cards (some cards will be riskier); cycles are card-major
+            risk = np.repeat(rng.choice(RISK_PROFILES, len(cards), p=RISK_P), spec["months"])
+            cycles = make_billing_cycles(rng, cards["card_id"], spec["months"], as_of)
+
+            writers["credit_cards"].write(cards)
+            writers["billing_cycles"].write(cycles)
+            writers["transactions"].write(make_transactions(rng, cycles))
+            writers["payments"].write(make_payments(rng, cycles, risk))
+    return parts
+
+
+def _split(total, shards, i):
+    return total * i // shards, total * (i + 1) // shards
+
+def generate(users=20, cards=30, months=6, seed=42, shards=1, workers=1, batch_cards=5000, as_of=None, csv=True):
+    as_of = as_of or date.today().isoformat()
+    # Every shard needs users for its cards, and cards to write its card tables
+    shards = max(1, min(shards, users, cards))
+    seeds = np.random.SeedSequence(seed).spawn(shards)
+    specs = []
+    for i in range(shards):
+        user_lo, user_hi = _split(users, shards, i)
+        card_lo, card_hi = _split(cards, shards, i)
+        specs.append({
+            "shard": i, "seed": seeds[i], "as_of": as_of, "months": months, "batch_cards": batch_cards,
+            "user_lo": user_lo, "user_hi": user_hi, "card_lo": card_lo, "card_hi": card_hi
+        })
 
-# -----------------------------
-# SAVE FILES
-# -----------------------------
-users.to_csv(DATA_RAW / "users.csv", index=False)
-cards.to_csv(DATA_RAW / "credit_cards.csv", index=False)
-billing_cycles.to_csv(DATA_RAW / "billing_cycles.csv", index=False)
-transactions.to_csv(DATA_RAW / "transactions.csv", index=False)
-payments.to_csv(DATA_RAW / "payments.csv", index=False)
-
-print("✅ Synthetic base tables generated successfully.")
-print("✅ Transactions generated.")
-print("✅ Payments generated.")
-print(f"✅ Default rate: {payments['default_flag'].mean():.2%}")
-print(f"   Total payments: {len(payments)}")
-print(f"   Defaults: {payments['default_flag'].sum()}")
\ No newline at end of file
+    PARTS_DIR.mkdir(parents=True, exist_ok=True)
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            shard_parts = list(pool.map(generate_shard, specs))
+    else:
+        shard_parts = [generate_shard(spec) for spec in specs]
+
+    # Stitch shard parts into the final tables in shard order
+    rows = {}
+    for name in TABLE_NAMES:
+        with TableWriter(name, csv=csv) as out:
+            for parts in shard_parts:
+                for batch in pq.ParquetFile(parts[name]).iter_batches():
+                    out.write(batch.to_pandas())
+        rows[name] = out.rows
+    shutil.rmtree(PARTS_DIR, ignore_errors=True)
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate synthetic credit card data into data/raw")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--cards", type=int, default=30)
+    parser.add_argument("--months", type=int, default=6, help="billing cycles per card")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--shards", type=int, default=None, help="user shards (default: --workers)")
+    parser.add_argument("--workers", type=int, default=1, help="processes generating shards in parallel")
+    parser.add_argument("--batch-cards", type=int, default=5000, help="cards generated per in-memory batch")
+    parser.add_argument("--as-of", default=None, help="reference date YYYY-MM-DD (default: today)")
+    parser.add_argument("--no-csv", action="store_true", help="write Parquet only, skip the CSV export")
+    args = parser.parse_args()
+
+    rows = generate(
+        users=args.users, cards=args.cards, months=args.months, seed=args.seed,
+        shards=args.shards or args.workers, workers=args.workers,
+        batch_cards=args.batch_cards, as_of=args.as_of, csv=not args.no_csv
+    )
+
+    payments = pq.read_table(DATA_RAW / "payments.parquet", columns=["default_flag"]).column("default_flag").to_numpy()
+    print("✅ Synthetic base tables generated successfully.")
+    print(f"✅ Transactions generated: {rows['transactions']}")
+    print("✅ Payments generated.")
+    print(f"✅ Default rate: {payments.mean():.2%}")
+    print(f"   Total payments: {len(payments)}")
+    print(f"   Defaults: {payments.sum()}")
@@ -1,87 +1,125 @@
+import argparse
+import shutil
+import numpy as np
 import pandas as pd
-from pathlib import Path
-from sklearn.linear_model import LogisticRegression
+from concurrent.futures import ProcessPoolExecutor
 
-# -----------------------------
-# Paths
-# -----------------------------
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DATA_PROCESSED = PROJECT_ROOT / "data" / "processed"
+from src.api.model_registry import MODEL_PATH, load_artifact
+from src.api.scoring import FEATURE_COLUMNS
+from src.storage import DATA_PROCESSED, TableWriter, iter_table, table_paths, use_parquet
 
-# -----------------------------
-# Load Features
-# -----------------------------
-features = pd.read_csv(DATA_PROCESSED / "model_features.csv")
-
-feature_cols = [
-    "avg_payment_delay",
-    "max_payment_delay",
-    "std_payment_delay",
-    "avg_payment_ratio",
-    "min_payment_ratio",
-    "avg_utilization",
-    "max_utilization",
-    "income_low",
-    "income_medium",
-    "age_18_25",
-    "age_26_35",
-    "age_36_50"
-]
-
-X = features[feature_cols]
-y = features["default_flag"]
+# Rows scored per in-memory batch
+BATCH_SIZE = 1_000_000
+PARTS_DIR = DATA_PROCESSED / ".parts"
 
 # -----------------------------
-# Train final model on ALL data
+# Risk Categories
 # -----------------------------
-model = LogisticRegression(max_iter=1000)
-model.fit(X, y)
+# score >= 800 Excellent, >= 700 Good, >= 600 Fair, >= 500 Poor, else Very Risky
+SCORE_BINS = [500, 600, 700, 800]
+RISK_BANDS = ["Very Risky", "Poor", "Fair", "Good", "Excellent"]
 
-# -----------------------------
-# Predict probabilities
-# -----------------------------
-features["default_probability"] = model.predict_proba(X)[:, 1]
+# Convert default probabilities to credit scores (900 best, 300 worst)
+def credit_scores(probabilities):
+    return (900 - probabilities * 600).astype(np.int64)
+
+# Vectorized banding: one np.digitize instead of a Python call per row
+def assign_risk(scores):
+    return pd.Categorical.from_codes(np.digitize(scores, SCORE_BINS), RISK_BANDS)
+
+def score_frame(scorer, features):
+    probabilities = scorer.predict_many(features[FEATURE_COLUMNS].to_numpy(dtype=np.float64))
+    scores = credit_scores(probabilities)
+    return pd.DataFrame({
+        "user_id": features["user_id"].to_numpy(),
+        "credit_score": scores,
+        "risk_category": assign_risk(scores),
+        "default_probability": probabilities
+    })
 
-# -----------------------------
-# Convert to Credit Score
-# -----------------------------
-features["credit_score"] = 900 - (features["default_probability"] * 600)
-features["credit_score"] = features["credit_score"].astype(int)
 
 # -----------------------------
-# Risk Categories
+# Workers
 # -----------------------------
-def assign_risk(score):
-    if score >= 800:
-        return "Excellent"
-    elif score >= 700:
-        return "Good"
-    elif score >= 600:
-        return "Fair"
-    elif score >= 500:
-        return "Poor"
-    else:
-        return "Very Risky"
-
-features["risk_category"] = features["credit_score"].apply(assign_risk)
+# Each worker loads the scorer once, then scores whole Parquet row groups it
+# reads itself, so only file paths and band counts cross process boundaries.
+_scorer = None
+
+def _init_worker(scorer):
+    global _scorer
+    _scorer = scorer
+
+def score_row_groups(spec):
+    import pyarrow.parquet as pq
+    source = pq.ParquetFile(spec["input"], memory_map=True)
+    counts = np.zeros(len(RISK_BANDS), dtype=np.int64)
+    with TableWriter("credit_scores", path=spec["output"]) as out:
+        batches = source.iter_batches(
+            batch_size=spec["batch_size"], row_groups=spec["row_groups"], columns=["user_id", *FEATURE_COLUMNS]
+        )
+        for batch in batches:
+            scored = score_frame(_scorer, batch.to_pandas())
+            counts += np.bincount(scored["risk_category"].cat.codes, minlength=len(RISK_BANDS))
+            out.write(scored)
+    return spec["output"], counts
+
 
 # -----------------------------
-# Save report
+# Batch scoring engine
 # -----------------------------
-output_cols = [
-    "user_id",
-    "credit_score",
-    "risk_category",
-    "default_probability"
-]
-
-features[output_cols].to_csv(
-    DATA_PROCESSED / "credit_scores.csv",
-    index=False
-)
-
-print("\n✅ CREDIT SCORING COMPLETE!")
-print(features[output_cols].head())
-
-print("\nScore Distribution:")
-print(features["risk_category"].value_counts())
+# Score every row of model_features with the saved model (no refit) and write
+# credit_scores.parquet (+ CSV) incrementally. Returns row counts per band.
+# Pass scorer= to reuse an already loaded model (e.g. from the pipeline).
+def score_portfolio(model_path=MODEL_PATH, workers=1, batch_size=BATCH_SIZE, csv=True, scorer=None):
+    scorer = scorer or load_artifact(model_path).scorer
+    counts = np.zeros(len(RISK_BANDS), dtype=np.int64)
+
+    if workers <= 1 or not use_parquet("model_features"):
+        # Single process (or CSV-only input): stream straight into the output
+        with TableWriter("credit_scores", csv=csv) as out:
+            for chunk in iter_table("model_features", columns=["user_id", *FEATURE_COLUMNS], batch_size=batch_size):
+                scored = score_frame(scorer, chunk)
+                counts += np.bincount(scored["risk_category"].cat.codes, minlength=len(RISK_BANDS))
+                out.write(scored)
+        return pd.Series(counts, index=RISK_BANDS)
+
+    import pyarrow.parquet as pq
+    input_path, _ = table_paths("model_features")
+    n_groups = pq.ParquetFile(input_path).num_row_groups
+    shards = max(1, min(workers, n_groups))
+    PARTS_DIR.mkdir(parents=True, exist_ok=True)
+    specs = [{
+        "input": input_path,
+        "output": PARTS_DIR / f"credit_scores-{i:04d}.parquet",
+        "row_groups": list(range(n_groups * i // shards, n_groups * (i + 1) // shards)),
+        "batch_size": batch_size
+    } for i in range(shards)]
+
+    with ProcessPoolExecutor(shards, initializer=_init_worker, initargs=(scorer,)) as pool:
+        results = list(pool.map(score_row_groups, specs))
+
+    # Stitch parts in input order
+    with TableWriter("credit_scores", csv=csv) as out:
+        for part, part_counts in results:
+            counts += part_counts
+            for batch in pq.ParquetFile(part).iter_batches(batch_size=batch_size):
+                out.write(batch.to_pandas())
+    shutil.rmtree(PARTS_DIR, ignore_errors=True)
+    return pd.Series(counts, index=RISK_BANDS)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Re-score all users in model_features with the saved model")
+    parser.add_argument("--model", default=MODEL_PATH, help="model artifact (default: models/credit_risk_model.pkl)")
+    parser.add_argument("--workers", type=int, default=1, help="processes scoring row groups in parallel")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--no-csv", action="store_true", help="write Parquet only, skip the CSV export")
+    args = parser.parse_args()
+
+    distribution = score_portfolio(args.model, args.workers, args.batch_size, csv=not args.no_csv)
+
+    print("\n✅ CREDIT SCORING COMPLETE!")
+    print(next(iter_table("credit_scores", batch_size=5)).head())
+
+    print("\nScore Distribution:")
+    print(distribution[distribution > 0].sort_values(ascending=False))
@@ -1,38 +1,26 @@
 import shap
 import pandas as pd
-from pathlib import Path
-from sklearn.linear_model import LogisticRegression
 
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DATA_PROCESSED = PROJECT_ROOT / "data" / "processed"
+from src.api.model_registry import MODEL_PATH, load_artifact
+from src.api.scoring import FEATURE_COLUMNS
+from src.storage import read_table
 
-# Load features
-features = pd.read_csv(DATA_PROCESSED / "model_features.csv")
 
-feature_cols = [
-    "avg_payment_delay","max_payment_delay","std_payment_delay",
-    "avg_payment_ratio","min_payment_ratio",
-    "avg_utilization","max_utilization",
-    "income_low","income_medium",
-    "age_18_25","age_26_35","age_36_50"
-]
+# Mean |SHAP value| per feature for the given (already fitted) model
+def feature_importance(model, X):
+    explainer = shap.LinearExplainer(model, X)
+    shap_values = explainer.shap_values(X)
+    return pd.DataFrame({
+        "feature": FEATURE_COLUMNS,
+        "impact": abs(shap_values).mean(axis=0)
+    }).sort_values("impact", ascending=False)
 
-X = features[feature_cols]
-y = features["default_flag"]
 
-# Train model
-model = LogisticRegression(max_iter=1000)
-model.fit(X, y)
+if __name__ == "__main__":
+    # Explain the saved model instead of refitting one
+    X = read_table("model_features", columns=FEATURE_COLUMNS)
+    model = load_artifact(MODEL_PATH).model
 
-# SHAP explainability
-explainer = shap.LinearExplainer(model, X)
-shap_values = explainer.shap_values(X)
-
-# Summary
-print("\nTop Risk Drivers:")
-importance = pd.DataFrame({
-    "feature": feature_cols,
-    "impact": abs(shap_values).mean(axis=0)
-}).sort_values("impact", ascending=False)
-
-print(importance)
+    # Summary
+    print("\nTop Risk Drivers:")
+    print(feature_importance(model, X))
@@ -1,90 +1,210 @@
+import argparse
+import numpy as np
 import pandas as pd
-from pathlib import Path
 
-# -----------------------------
-# Paths
-# -----------------------------
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DATA_RAW = PROJECT_ROOT / "data" / "raw"
-DATA_PROCESSED = PROJECT_ROOT / "data" / "processed"
-DATA_PROCESSED.mkdir(parents=True, exist_ok=True)
+from src.storage import read_table, iter_table, write_table
+from src.modeling.transaction_features import build_transaction_features
+
+# Payments are streamed in chunks of this many rows; only the chunk plus
+# per-cycle / per-card / per-user lookup arrays are held in memory.
+CHUNK_SIZE = 1_000_000
+
 
 # -----------------------------
-# Load Data
+# Lookup arrays
 # -----------------------------
-billing = pd.read_csv(DATA_RAW / "billing_cycles.csv")
-payments = pd.read_csv(DATA_RAW / "payments.csv")
-cards = pd.read_csv(DATA_RAW / "credit_cards.csv")
-demographics = pd.read_csv(DATA_RAW / "demographics.csv")
+# Instead of merging payments -> billing -> cards -> demographics, every
+# billing cycle is resolved once to (user code, total_due, utilization) and
+# payments index into those arrays by position.
+def build_lookups():
+    demographics = read_table("demographics", columns=["user_id", "income_band", "age_group"])
+    cards = read_table("credit_cards", columns=["card_id", "user_id", "credit_limit"])
+    billing = read_table("billing_cycles", columns=["billing_cycle_id", "card_id", "total_due"])
+
+    # Only users with demographics survive the final join, so they define the user codes
+    users = pd.Index(demographics["user_id"].unique())
+    card_user = users.get_indexer(cards["user_id"])
+    card_limit = cards["credit_limit"].to_numpy(dtype=np.float64)
+
+    card_code = pd.Index(cards["card_id"]).get_indexer(billing["card_id"])
+    known = card_code >= 0
+    cycle_user = np.where(known, card_user[card_code], -1)
+    total_due = billing["total_due"].to_numpy(dtype=np.float64)
+    utilization = np.where(known, total_due / card_limit[card_code], np.nan)
+
+    return {
+        "users": users,
+        "demographics": demographics,
+        "cycles": pd.Index(billing["billing_cycle_id"]),
+        "cycle_user": cycle_user,
+        "total_due": total_due,
+        "utilization": utilization
+    }
 
-# Convert dates
-billing["due_date"] = pd.to_datetime(billing["due_date"])
-payments["payment_date"] = pd.to_datetime(payments["payment_date"])
 
 # -----------------------------
-# Merge Data
+# Running per-user aggregates
 # -----------------------------
-# Start with payments (which already has default_flag!)
-data = payments.merge(billing, on="billing_cycle_id")
-data = data.merge(cards[["card_id", "credit_limit", "user_id"]], on="card_id")
-data = data.merge(demographics[["user_id", "income_band", "age_group"]], on="user_id")
+# State is one array per statistic, indexed by user code, and survives across
+# chunks. Order-independent stats (count, min, max) use bincount / ufunc.at.
+# Means use Kahan-compensated sums and the delay std uses Welford's update,
+# the same recurrences pandas' groupby applies, so the streamed result is
+# bit-identical to one groupby over the fully merged frame.
+def _rank_slices(user):
+    # Split a chunk into slices in which every user appears at most once,
+    # keeping each user's rows in file order (slice r = each user's r-th row)
+    order = np.argsort(user, kind="stable")
+    sorted_user = user[order]
+    starts = np.flatnonzero(np.r_[True, sorted_user[1:] != sorted_user[:-1]])
+    rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+    by_rank = np.argsort(rank, kind="stable")
+    bounds = np.searchsorted(rank[by_rank], np.arange(rank.max() + 2))
+    for r in range(len(bounds) - 1):
+        yield order[by_rank[bounds[r]:bounds[r + 1]]]
+
+
+class KahanSum:
+
+    def __init__(self, n):
+        self.total = np.zeros(n)
+        self.compensation = np.zeros(n)
+
+    def add(self, user, values):
+        y = values - self.compensation[user]
+        t = self.total[user] + y
+        c = (t - self.total[user]) - y
+        self.compensation[user] = np.where(np.isnan(c), 0.0, c)
+        self.total[user] = t
+
+
+class UserAggregates:
+
+    def __init__(self, n_users):
+        self.count = np.zeros(n_users, dtype=np.int64)
+        self.delay_sum = KahanSum(n_users)
+        self.delay_mean = np.zeros(n_users)  # Welford running mean
+        self.delay_m2 = np.zeros(n_users)
+        self.delay_max = np.full(n_users, -np.inf)
+        self.ratio_sum = KahanSum(n_users)
+        self.ratio_min = np.full(n_users, np.inf)
+        self.util_sum = KahanSum(n_users)
+        self.util_max = np.full(n_users, -np.inf)
+        self.default_max = np.zeros(n_users, dtype=np.int64)
+
+    def update(self, user, delay, ratio, util, default):
+        if len(user) == 0:
+            return
+        np.maximum.at(self.delay_max, user, delay)
+        np.minimum.at(self.ratio_min, user, ratio)
+        np.maximum.at(self.util_max, user, util)
+        np.maximum.at(self.default_max, user, default)
+
+        for rows in _rank_slices(user):
+            u = user[rows]
+            self.count[u] += 1
+            self.delay_sum.add(u, delay[rows])
+            self.ratio_sum.add(u, ratio[rows])
+            self.util_sum.add(u, util[rows])
+
+            old_mean = self.delay_mean[u]
+            new_mean = old_mean + (delay[rows] - old_mean) / self.count[u]
+            self.delay_m2[u] += (delay[rows] - new_mean) * (delay[rows] - old_mean)
+            self.delay_mean[u] = new_mean
+
+    def to_frame(self, users):
+        seen = self.count > 0
+        count = self.count[seen]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt(self.delay_m2[seen] / (count - 1))
+        return pd.DataFrame({
+            "user_id": users[seen],
+            "avg_payment_delay": self.delay_sum.total[seen] / count,
+            "max_payment_delay": self.delay_max[seen],
+            # Fill NaN values (std is NaN for users with only 1 payment)
+            "std_payment_delay": np.where(count > 1, std, 0.0),
+            "avg_payment_ratio": self.ratio_sum.total[seen] / count,
+            "min_payment_ratio": self.ratio_min[seen],
+            "avg_utilization": self.util_sum.total[seen] / count,
+            "max_utilization": self.util_max[seen],
+            "default_flag": self.default_max[seen]
+        })
+
 
 # -----------------------------
 # Feature Engineering
 # -----------------------------
-# Payment behavior features
-data["payment_delay"] = data["days_late"]  # Use the days_late we already calculated
-data["payment_ratio"] = data["payment_amount"] / data["total_due"]
-data["min_payment_ratio"] = data["payment_amount"] / data["minimum_due"]
-data["utilization"] = data["total_due"] / data["credit_limit"]
-
-# Aggregate features by user
-user_features = data.groupby("user_id").agg({
-    "payment_delay": ["mean", "max", "std"],
-    "payment_ratio": ["mean", "min"],
-    "utilization": ["mean", "max"],
-    "default_flag": "max"  # User is defaulter if ANY payment defaulted
-}).reset_index()
-
-# Flatten column names
-user_features.columns = [
-    "user_id",
-    "avg_payment_delay",
-    "max_payment_delay", 
-    "std_payment_delay",
-    "avg_payment_ratio",
-    "min_payment_ratio",
-    "avg_utilization",
-    "max_utilization",
-    "default_flag"
-]
-
-# Fill NaN values (std might be NaN for users with only 1 payment)
-user_features["std_payment_delay"] = user_features["std_payment_delay"].fillna(0)
-
-# Add demographic features
-user_features = user_features.merge(
-    demographics[["user_id", "income_band", "age_group"]], 
-    on="user_id"
-)
-
-# Encode categorical variables
-user_features["income_low"] = (user_features["income_band"] == "low").astype(int)
-user_features["income_medium"] = (user_features["income_band"] == "medium").astype(int)
-user_features["income_high"] = (user_features["income_band"] == "high").astype(int)
-
-user_features["age_18_25"] = (user_features["age_group"] == "18-25").astype(int)
-user_features["age_26_35"] = (user_features["age_group"] == "26-35").astype(int)
-user_features["age_36_50"] = (user_features["age_group"] == "36-50").astype(int)
-user_features["age_51_plus"] = (user_features["age_group"] == "51+").astype(int)
+# Stream payments into per-user running aggregates (also used to backfill the
+# online feature store, see src/api/feature_store.py)
+def aggregate_payments(lookups, chunk_size=CHUNK_SIZE):
+    aggregates = UserAggregates(len(lookups["users"]))
 
-# -----------------------------
-# Save Features
-# -----------------------------
-user_features.to_csv(DATA_PROCESSED / "model_features.csv", index=False)
+    payment_chunks = iter_table(
+        "payments",
+        columns=["billing_cycle_id", "payment_amount", "days_late", "default_flag"],
+        batch_size=chunk_size
+    )
+    for chunk in payment_chunks:
+        cycle = lookups["cycles"].get_indexer(chunk["billing_cycle_id"])
+        user = np.where(cycle >= 0, lookups["cycle_user"][cycle], -1)
+        keep = user >= 0  # inner-join semantics: drop unknown cycles/cards/users
+        cycle, user = cycle[keep], user[keep]
+
+        aggregates.update(
+            user,
+            delay=chunk["days_late"].to_numpy(dtype=np.float64)[keep],
+            ratio=chunk["payment_amount"].to_numpy(dtype=np.float64)[keep] / lookups["total_due"][cycle],
+            util=lookups["utilization"][cycle],
+            default=chunk["default_flag"].to_numpy(dtype=np.int64)[keep]
+        )
+    return aggregates
+
+
+def build_user_features(chunk_size=CHUNK_SIZE, transactions=True):
+    lookups = build_lookups()
+    aggregates = aggregate_payments(lookups, chunk_size)
+
+    # groupby("user_id") ordering: sorted user ids
+    user_features = aggregates.to_frame(lookups["users"])
+    user_features = user_features.sort_values("user_id", kind="stable").reset_index(drop=True)
+    user_features["max_payment_delay"] = user_features["max_payment_delay"].astype(np.int64)
+
+    # Add demographic features
+    user_features = user_features.merge(
+        lookups["demographics"][["user_id", "income_band", "age_group"]],
+        on="user_id"
+    )
+
+    # Encode categorical variables
+    user_features["income_low"] = (user_features["income_band"] == "low").astype(int)
+    user_features["income_medium"] = (user_features["income_band"] == "medium").astype(int)
+    user_features["income_high"] = (user_features["income_band"] == "high").astype(int)
+
+    user_features["age_18_25"] = (user_features["age_group"] == "18-25").astype(int)
+    user_features["age_26_35"] = (user_features["age_group"] == "26-35").astype(int)
+    user_features["age_36_50"] = (user_features["age_group"] == "36-50").astype(int)
+    user_features["age_51_plus"] = (user_features["age_group"] == "51+").astype(int)
+
+    # Add 30/90-day transaction behaviour (spend velocity, category shares, online ratio)
+    if transactions:
+        user_features = user_features.merge(build_transaction_features(lookups["users"]), on="user_id", how="left")
+
+    return user_features
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build model_features from the raw tables")
+    parser.add_argument("--no-transactions", action="store_true", help="skip the transaction feature stage")
+    args = parser.parse_args()
+
+    user_features = build_user_features(transactions=not args.no_transactions)
+
+    # -----------------------------
+    # Save Features
+    # -----------------------------
+    write_table(user_features, "model_features")
 
-print("✅ Feature engineering complete!")
-print(f"   Total users: {len(user_features)}")
-print(f"   Features created: {len(user_features.columns) - 2}")  # Exclude user_id and default_flag
-print(f"   Default rate: {user_features['default_flag'].mean():.2%}")
-print(f"   Defaulters: {user_features['default_flag'].sum()}")
\ No newline at end of file
+    print("✅ Feature engineering complete!")
+    print(f"   Total users: {len(user_features)}")
+    print(f"   Features created: {len(user_features.columns) - 2}")  # Exclude user_id and default_flag
+    print(f"   Default rate: {user_features['default_flag'].mean():.2%}")
+    print(f"   Defaulters: {user_features['default_flag'].sum()}")
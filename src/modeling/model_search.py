@@ -0,0 +1,266 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from src.api.model_registry import MODEL_PATH
+from src.api.scoring import FEATURE_COLUMNS
+from src.api.workers import available_cpus
+from src.storage import DATA_PROCESSED, read_table
+
+# Cross-validated sweep over model families and hyperparameters:
+#   python -m src.modeling.model_search [--families logistic random_forest ...] [--folds 5] [--workers N] [--no-save]
+# Every (candidate, fold) fit runs in a process pool. The feature matrix is
+# written once as .npy and memory-mapped by each worker, so tasks carry only a
+# family name, parameters and a fold number. Fold results are cached on disk
+# by content (data, folds, candidate, sklearn version); a re-run only fits
+# what changed. The leaderboard goes next to the fold cache
+# (data/processed/.model_search/leaderboard.{csv,json}) and the winner,
+# refitted on all rows, becomes models/credit_risk_model.pkl.
+SEARCH_DIR = DATA_PROCESSED / ".model_search"
+LEADERBOARD_PATH = SEARCH_DIR / "leaderboard.csv"
+N_FOLDS = 5
+RANDOM_STATE = 42
+
+# Regularization path for the logistic model, strongest first: each fit
+# starts from the previous solution (warm_start), so the whole path costs
+# little more than one cold fit
+LOGISTIC_PATH = [0.001, 0.01, 0.1, 1.0, 10.0, 100.0]
+
+
+# -----------------------------
+# Search space
+# -----------------------------
+# Families and grids follow notebooks/07_stronger_models.ipynb (depth-limited
+# tree, controlled forest), plus histogram gradient boosting
+def _grid(**axes):
+    keys = list(axes)
+    grid = [{}]
+    for key in keys:
+        grid = [{**params, key: value} for params in grid for value in axes[key]]
+    return grid
+
+SEARCH_SPACE = {
+    "logistic": [{"C": c} for c in LOGISTIC_PATH],
+    "decision_tree": _grid(max_depth=[3, 5, 8], min_samples_leaf=[20, 50]),
+    "random_forest": _grid(n_estimators=[200], max_depth=[6, 10], min_samples_leaf=[20, 50]),
+    "hist_gradient_boosting": _grid(learning_rate=[0.05, 0.1], max_leaf_nodes=[15, 31], l2_regularization=[0.0, 1.0])
+}
+
+# One process per fit: estimators stay single-threaded
+def make_model(family: str, params: dict):
+    if family == "logistic":
+        from sklearn.linear_model import LogisticRegression
+        return LogisticRegression(max_iter=1000, random_state=RANDOM_STATE, **params)
+    if family == "decision_tree":
+        from sklearn.tree import DecisionTreeClassifier
+        return DecisionTreeClassifier(random_state=RANDOM_STATE, **params)
+    if family == "random_forest":
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(random_state=RANDOM_STATE, n_jobs=1, **params)
+    if family == "hist_gradient_boosting":
+        from sklearn.ensemble import HistGradientBoostingClassifier
+        return HistGradientBoostingClassifier(random_state=RANDOM_STATE, early_stopping=False, **params)
+    raise ValueError(f"Unknown model family: {family}")
+
+def candidate_key(family: str, params: dict):
+    return hashlib.sha256(f"{family}\n{json.dumps(params, sort_keys=True)}".encode()).hexdigest()[:16]
+
+
+# -----------------------------
+# Shared feature matrix
+# -----------------------------
+# X (float64, C order) and y saved under SEARCH_DIR/<data key>/, named by the
+# hash of their bytes, the fold count and the sklearn version, so fold caches
+# of a different dataset or fold layout never mix
+def write_matrix(features, n_folds):
+    X = np.ascontiguousarray(features[FEATURE_COLUMNS].to_numpy(dtype=np.float64))
+    y = features["default_flag"].to_numpy(dtype=np.int8)
+    sha = hashlib.sha256(X.tobytes())
+    sha.update(y.tobytes())
+    sha.update(f"{n_folds}\n{RANDOM_STATE}\n{sklearn.__version__}".encode())
+    data_dir = SEARCH_DIR / sha.hexdigest()[:16]
+    (data_dir / "folds").mkdir(parents=True, exist_ok=True)
+    for name, array in (("X", X), ("y", y)):
+        path = data_dir / f"{name}.npy"
+        if not path.exists():
+            tmp = data_dir / f"{name}.tmp.npy"
+            np.save(tmp, array)
+            os.replace(tmp, path)
+    return data_dir
+
+
+# -----------------------------
+# Workers
+# -----------------------------
+# Each worker memory-maps X/y (the OS page cache holds one copy for all of
+# them) and derives the same stratified folds from y
+_X = _y = _folds = None
+
+def _init_worker(data_dir, n_folds):
+    global _X, _y, _folds
+    from sklearn.model_selection import StratifiedKFold
+    _X = np.load(data_dir / "X.npy", mmap_mode="r")
+    _y = np.load(data_dir / "y.npy", mmap_mode="r")
+    splitter = StratifiedKFold(n_splits=n_folds, shuffle=True, random_state=RANDOM_STATE)
+    _folds = list(splitter.split(np.zeros(len(_y)), _y))
+
+def _score(model, X_valid, y_valid):
+    from sklearn.metrics import log_loss, roc_auc_score
+    proba = model.predict_proba(X_valid)[:, 1]
+    return {
+        "roc_auc": float(roc_auc_score(y_valid, proba)),
+        "log_loss": float(log_loss(y_valid, proba, labels=[0, 1]))
+    }
+
+# One task: a family, a list of parameter sets and a fold. Logistic tasks
+# carry the whole C path and walk it with one warm-started estimator; other
+# families get one parameter set per task. Returns one result per set.
+def fit_fold(family: str, params_list: list, fold: int):
+    train_idx, valid_idx = _folds[fold]
+    X_train, y_train = _X[train_idx], _y[train_idx]
+    X_valid, y_valid = _X[valid_idx], _y[valid_idx]
+
+    results = []
+    model = None
+    for params in params_list:
+        start = time.perf_counter()
+        if family == "logistic" and model is not None:
+            model.set_params(**params)
+        else:
+            model = make_model(family, params)
+            if family == "logistic":
+                model.set_params(warm_start=True)
+        model.fit(X_train, y_train)
+        results.append({
+            **_score(model, X_valid, y_valid),
+            "fit_seconds": round(time.perf_counter() - start, 4),
+            "n_iter": int(model.n_iter_[0]) if family == "logistic" else None
+        })
+    return family, params_list, fold, results
+
+
+# -----------------------------
+# Fold cache
+# -----------------------------
+def fold_path(data_dir, family: str, params: dict, fold: int):
+    return data_dir / "folds" / f"{family}-{candidate_key(family, params)}-{fold}.json"
+
+def load_fold(data_dir, family, params, fold):
+    path = fold_path(data_dir, family, params, fold)
+    return json.loads(path.read_text()) if path.exists() else None
+
+def save_fold(data_dir, family, params, fold, result):
+    path = fold_path(data_dir, family, params, fold)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(result))
+    os.replace(tmp, path)
+
+
+# -----------------------------
+# Search
+# -----------------------------
+# Tasks still to run: a logistic path is re-walked for a fold when any of its
+# points is missing (the path is only cheap end to end)
+def pending_tasks(data_dir, families, n_folds):
+    tasks = []
+    for family in families:
+        grid = SEARCH_SPACE[family]
+        groups = [sorted(grid, key=lambda p: p["C"])] if family == "logistic" else [[params] for params in grid]
+        for params_list in groups:
+            for fold in range(n_folds):
+                if any(load_fold(data_dir, family, params, fold) is None for params in params_list):
+                    tasks.append((family, params_list, fold))
+    # Slowest families first so the pool does not end on one long fit
+    order = {family: i for i, family in enumerate(["random_forest", "hist_gradient_boosting", "decision_tree", "logistic"])}
+    return sorted(tasks, key=lambda task: order.get(task[0], -1))
+
+def run_search(features, families=tuple(SEARCH_SPACE), n_folds=N_FOLDS, workers=None):
+    workers = workers or available_cpus()
+    data_dir = write_matrix(features, n_folds)
+    tasks = pending_tasks(data_dir, families, n_folds)
+
+    start = time.perf_counter()
+    if tasks:
+        with ProcessPoolExecutor(min(workers, len(tasks)), initializer=_init_worker, initargs=(data_dir, n_folds)) as pool:
+            futures = [pool.submit(fit_fold, *task) for task in tasks]
+            for future in as_completed(futures):
+                family, params_list, fold, results = future.result()
+                for params, result in zip(params_list, results):
+                    save_fold(data_dir, family, params, fold, result)
+
+    leaderboard = build_leaderboard(data_dir, families, n_folds)
+    stats = {"n_folds": n_folds, "fits": sum(len(t[1]) for t in tasks), "tasks": len(tasks), "workers": workers,
+             "seconds": round(time.perf_counter() - start, 3), "data_dir": str(data_dir)}
+    return leaderboard, stats
+
+# One row per candidate: fold means/stds, ranked by mean ROC-AUC
+def build_leaderboard(data_dir, families, n_folds):
+    rows = []
+    for family in families:
+        for params in SEARCH_SPACE[family]:
+            folds = [load_fold(data_dir, family, params, fold) for fold in range(n_folds)]
+            auc = np.array([f["roc_auc"] for f in folds])
+            loss = np.array([f["log_loss"] for f in folds])
+            rows.append({
+                "family": family,
+                "params": json.dumps(params, sort_keys=True),
+                "roc_auc_mean": auc.mean(),
+                "roc_auc_std": auc.std(),
+                "log_loss_mean": loss.mean(),
+                "fit_seconds_mean": np.mean([f["fit_seconds"] for f in folds])
+            })
+    leaderboard = pd.DataFrame(rows).sort_values(["roc_auc_mean", "log_loss_mean"], ascending=[False, True], ignore_index=True)
+    leaderboard.insert(0, "rank", np.arange(1, len(leaderboard) + 1))
+    return leaderboard
+
+def save_leaderboard(leaderboard, stats, path=LEADERBOARD_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    leaderboard.to_csv(path, index=False)
+    payload = {"search": stats, "candidates": leaderboard.to_dict(orient="records")}
+    path.with_suffix(".json").write_text(json.dumps(payload, indent=2, default=str))
+
+# Refit the top candidate on every row (as a DataFrame, so the artifact knows
+# its feature names) and save it where the API loads models from
+def save_winner(features, leaderboard, n_folds, path=MODEL_PATH):
+    from src.modeling.training import save_artifact
+    best = leaderboard.iloc[0]
+    params = json.loads(best["params"])
+    model = make_model(best["family"], params)
+    model.fit(features[FEATURE_COLUMNS], features["default_flag"])
+    return save_artifact(model, {
+        "n_train": len(features),
+        "model_family": best["family"],
+        "model_params": params,
+        "cv": {"n_folds": n_folds, "roc_auc_mean": float(best["roc_auc_mean"]),
+               "roc_auc_std": float(best["roc_auc_std"]), "log_loss_mean": float(best["log_loss_mean"])}
+    }, path=path, background=features)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cross-validate model families and hyperparameters in a process pool")
+    parser.add_argument("--families", nargs="+", choices=list(SEARCH_SPACE), default=list(SEARCH_SPACE))
+    parser.add_argument("--folds", type=int, default=N_FOLDS)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per available CPU)")
+    parser.add_argument("--top", type=int, default=10, help="leaderboard rows to print")
+    parser.add_argument("--no-save", action="store_true", help="write the leaderboard only, keep the current model")
+    args = parser.parse_args()
+
+    features = read_table("model_features", columns=[*FEATURE_COLUMNS, "default_flag"])
+    leaderboard, stats = run_search(features, args.families, args.folds, args.workers)
+    save_leaderboard(leaderboard, stats)
+
+    print(f"✅ {stats['fits']} fits in {stats['tasks']} tasks on {stats['workers']} workers: {stats['seconds']:.1f}s "
+          f"({len(leaderboard) * args.folds - stats['fits']} cached)\n")
+    print(leaderboard.head(args.top).to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+    print(f"\n✅ Leaderboard saved at: {LEADERBOARD_PATH}")
+
+    if not args.no_save:
+        loaded = save_winner(features, leaderboard, args.folds)
+        print(f"✅ Winner {leaderboard.iloc[0]['family']} {leaderboard.iloc[0]['params']} saved as model {loaded.version} at: {loaded.path}")
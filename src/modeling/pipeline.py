@@ -0,0 +1,192 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.api.model_registry import MODEL_PATH, load_artifact
+from src.storage import DATA_PROCESSED, read_table, write_table, table_paths, use_parquet
+
+# Single entry point for the offline pipeline:
+#   features -> train -> evaluate -> score -> explain
+# Every stage has a content-addressed key (sha256 of its input files, its code
+# and its parameters). A stage whose key and outputs are unchanged since the
+# last run is skipped. The model is fitted once and handed to evaluation,
+# scoring and explanation in memory.
+#   python -m src.modeling.pipeline [--force [stage ...]] [--test-size 0.3] [--workers N]
+STAGES = ["features", "train", "evaluate", "score", "explain"]
+MANIFEST_PATH = DATA_PROCESSED / ".pipeline.json"
+RAW_TABLES = ["credit_cards", "billing_cycles", "transactions", "payments", "demographics"]
+
+
+# -----------------------------
+# Stage cache
+# -----------------------------
+class StageCache:
+
+    def __init__(self, path=MANIFEST_PATH):
+        self.path = path
+        self.manifest = json.loads(path.read_text()) if path.exists() else {"files": {}, "stages": {}}
+
+    # sha256 of a file's bytes, re-hashed only when its size or mtime changed
+    def digest(self, path):
+        path = Path(path)
+        st = path.stat()
+        signature = [st.st_size, st.st_mtime_ns]
+        entry = self.manifest["files"].get(str(path))
+        if entry and entry["signature"] == signature:
+            return entry["sha256"]
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                sha.update(block)
+        self.manifest["files"][str(path)] = {"signature": signature, "sha256": sha.hexdigest()}
+        return sha.hexdigest()
+
+    def key(self, *parts):
+        return hashlib.sha256("\n".join(map(str, parts)).encode()).hexdigest()
+
+    # Same key as last run and every recorded output still has the same content
+    def fresh(self, stage: str, key: str):
+        entry = self.manifest["stages"].get(stage)
+        if entry is None or entry["key"] != key:
+            return False
+        return all(Path(p).exists() and self.digest(p) == sha for p, sha in entry["outputs"].items())
+
+    def record(self, stage: str, key: str, outputs=(), info=None):
+        self.manifest["stages"][stage] = {
+            "key": key,
+            "outputs": {str(p): self.digest(p) for p in outputs},
+            "info": info or {}
+        }
+        self.save()
+
+    def info(self, stage: str):
+        return self.manifest["stages"][stage]["info"]
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_text(json.dumps(self.manifest, indent=2))
+        os.replace(tmp, self.path)
+
+
+# File read_table() would load for a table
+def table_file(name: str):
+    parquet_path, csv_path = table_paths(name)
+    return parquet_path if use_parquet(name) else csv_path
+
+def table_outputs(name: str):
+    return [p for p in table_paths(name) if p.exists()]
+
+def code_digest(cache, *modules):
+    return [cache.digest(module.__file__) for module in modules]
+
+
+# -----------------------------
+# Pipeline
+# -----------------------------
+def run_pipeline(force=(), test_size=0.3, workers=1, explain=True, csv=True):
+    import src.storage as storage
+    from src.modeling import credit_scoring, feature_engineering, training, transaction_features
+
+    cache = StageCache()
+    timings = {}
+    features = None
+
+    def timed(stage, cached, start):
+        timings[stage] = {"status": "cached" if cached else "ran", "seconds": round(time.perf_counter() - start, 3)}
+        print(f"{'⏭️ ' if cached else '✅'} {stage:<9} {timings[stage]['status']:<7} {timings[stage]['seconds']:.3f}s")
+
+    # 1. Features
+    start = time.perf_counter()
+    key = cache.key(
+        *(cache.digest(table_file(name)) for name in RAW_TABLES),
+        *code_digest(cache, feature_engineering, transaction_features, storage)
+    )
+    cached = "features" not in force and cache.fresh("features", key)
+    if not cached:
+        features = feature_engineering.build_user_features()
+        write_table(features, "model_features", csv=csv)
+        cache.record("features", key, table_outputs("model_features"))
+    timed("features", cached, start)
+    features_sha = cache.digest(table_file("model_features"))
+
+    # 2. Train (fit once) + 3. Evaluate on the holdout
+    start = time.perf_counter()
+    key = cache.key(features_sha, json.dumps(training.MODEL_PARAMS, sort_keys=True), test_size, *code_digest(cache, training))
+    cached = "train" not in force and "evaluate" not in force and cache.fresh("train", key)
+    if cached:
+        loaded = load_artifact(MODEL_PATH)
+        metrics = cache.info("train").get("metrics")
+        timed("train", True, start)
+        timed("evaluate", True, time.perf_counter())
+    else:
+        features = features if features is not None else read_table("model_features")
+        X_train, X_test, y_train, y_test = training.split(features, test_size)
+        model = training.fit_model(X_train, y_train)
+        timed("train", False, start)
+
+        start = time.perf_counter()
+        metrics = training.evaluate_model(model, X_test, y_test) if test_size else None
+        timed("evaluate", False, start)
+
+        loaded = training.save_artifact(model, {
+            "n_train": len(X_train),
+            "n_test": 0 if X_test is None else len(X_test),
+            "test_size": test_size,
+            "metrics": metrics,
+            "features_sha256": features_sha
+        }, background=features)
+        cache.record("train", key, [MODEL_PATH], {"version": loaded.version, "metrics": metrics})
+
+    # 4. Score the portfolio with the in-memory scorer
+    start = time.perf_counter()
+    key = cache.key(loaded.version, features_sha, csv, *code_digest(cache, credit_scoring))
+    cached = "score" not in force and cache.fresh("score", key)
+    if not cached:
+        distribution = credit_scoring.score_portfolio(workers=workers, csv=csv, scorer=loaded.scorer)
+        cache.record("score", key, table_outputs("credit_scores"), {"distribution": distribution.to_dict()})
+    timed("score", cached, start)
+
+    # 5. Explain (SHAP over the same in-memory model)
+    importance = None
+    if explain:
+        from src.modeling import explain_model
+        start = time.perf_counter()
+        key = cache.key(loaded.version, features_sha, *code_digest(cache, explain_model))
+        cached = "explain" not in force and cache.fresh("explain", key)
+        if not cached:
+            X = features[training.FEATURE_COLUMNS] if features is not None else read_table("model_features", columns=training.FEATURE_COLUMNS)
+            frame = explain_model.feature_importance(loaded.model, X)
+            cache.record("explain", key, info={"importance": dict(zip(frame["feature"], frame["impact"]))})
+        importance = cache.info("explain")["importance"]
+        timed("explain", cached, start)
+
+    # Timings (and the latest explanation) travel with the artifact metadata
+    metadata = training.load_metadata()
+    metadata["pipeline"] = {"run_at": datetime.now().isoformat(timespec="seconds"), "timings": timings}
+    if importance is not None:
+        metadata["feature_importance"] = importance
+    training.save_metadata(metadata)
+    return loaded, metrics, timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the offline pipeline, skipping stages whose inputs are unchanged")
+    parser.add_argument("--force", nargs="*", choices=STAGES, default=None, help="re-run these stages (all if none given)")
+    parser.add_argument("--test-size", type=float, default=0.3, help="holdout share for evaluation (0 = train on everything)")
+    parser.add_argument("--workers", type=int, default=1, help="processes for portfolio scoring")
+    parser.add_argument("--no-explain", action="store_true", help="skip the SHAP stage")
+    parser.add_argument("--no-csv", action="store_true", help="write Parquet only, skip the CSV exports")
+    args = parser.parse_args()
+
+    force = set() if args.force is None else set(args.force or STAGES)
+    loaded, metrics, timings = run_pipeline(force, args.test_size, args.workers, not args.no_explain, not args.no_csv)
+
+    print(f"\n✅ Pipeline complete — model {loaded.version} at {loaded.path}")
+    if metrics and metrics["roc_auc"] is not None:
+        print(f"   ROC-AUC (holdout): {metrics['roc_auc']:.4f}")
+    print(f"   Total: {sum(t['seconds'] for t in timings.values()):.3f}s")
@@ -1,20 +1,14 @@
 import pandas as pd
-from pathlib import Path
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import roc_auc_score, classification_report, confusion_matrix
 import numpy as np
 
-# -----------------------------
-# Paths
-# -----------------------------
-PROJECT_ROOT = Path(__file__).resolve().parents[2]
-DATA_PROCESSED = PROJECT_ROOT / "data" / "processed"
+from src.api.scoring import FEATURE_COLUMNS
+from src.storage import read_table
+from src.modeling.training import fit_model, split, evaluate_model, save_artifact
 
 # -----------------------------
 # Load engineered features
 # -----------------------------
-features = pd.read_csv(DATA_PROCESSED / "model_features.csv")
+features = read_table("model_features")
 
 print(f"Loaded {len(features)} users")
 print(f"Default rate: {features['default_flag'].mean():.2%}")
@@ -23,21 +17,7 @@ print(f"Defaulters: {features['default_flag'].sum()}")
 # -----------------------------
 # Prepare features
 # -----------------------------
-# Select feature columns
-feature_cols = [
-    "avg_payment_delay",
-    "max_payment_delay",
-    "std_payment_delay",
-    "avg_payment_ratio",
-    "min_payment_ratio",
-    "avg_utilization",
-    "max_utilization",
-    "income_low",
-    "income_medium",
-    "age_18_25",
-    "age_26_35",
-    "age_36_50"
-]
+feature_cols = FEATURE_COLUMNS
 
 X = features[feature_cols]
 y = features["default_flag"]
@@ -55,9 +35,7 @@ else:
     # -----------------------------
     # Split data
     # -----------------------------
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.3, random_state=42, stratify=y
-    )
+    X_train, X_test, y_train, y_test = split(features, test_size=0.3)
 
     print(f"\nTrain set: {len(X_train)} samples")
     print(f"Test set: {len(X_test)} samples")
@@ -65,27 +43,25 @@ else:
     # -----------------------------
     # Train model
     # -----------------------------
-    model = LogisticRegression(max_iter=1000, random_state=42)
-    model.fit(X_train, y_train)
+    model = fit_model(X_train, y_train)
 
     # -----------------------------
     # Evaluate
     # -----------------------------
-    preds_proba = model.predict_proba(X_test)[:, 1]
-    preds = model.predict(X_test)
+    metrics = evaluate_model(model, X_test, y_test)
 
     print("\n" + "="*50)
     print("MODEL EVALUATION")
     print("="*50)
     
-    if len(np.unique(y_test)) > 1:
-        print(f"\nROC-AUC Score: {roc_auc_score(y_test, preds_proba):.4f}")
+    if metrics["roc_auc"] is not None:
+        print(f"\nROC-AUC Score: {metrics['roc_auc']:.4f}")
     
     print("\nConfusion Matrix:")
-    print(confusion_matrix(y_test, preds))
+    print(np.array(metrics["confusion_matrix"]))
     
     print("\nClassification Report:")
-    print(classification_report(y_test, preds))
+    print(metrics["classification_report"])
 
     # -----------------------------
     # Feature Importance
@@ -102,9 +78,7 @@ else:
     print(coef_df.to_string(index=False))
     
     print("\n✅ Model training complete!")
-import joblib
-
-MODEL_PATH = DATA_PROCESSED / "credit_model.pkl"
-joblib.dump(model, MODEL_PATH)
 
-print("✅ Model saved!")
+    # Same artifact the API serves (models/credit_risk_model.pkl)
+    loaded = save_artifact(model, {"n_train": len(X_train), "n_test": len(X_test), "metrics": metrics}, background=features)
+    print(f"✅ Model {loaded.version} saved at: {loaded.path}")
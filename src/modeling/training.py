@@ -0,0 +1,80 @@
+import json
+import os
+from datetime import datetime
+
+import joblib
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score, classification_report, confusion_matrix
+from sklearn.model_selection import train_test_split
+
+from src.api.model_registry import MODEL_PATH, artifact_version, load_artifact, load_metadata, scorer_metadata
+from src.api.scoring import CompiledScorer, FEATURE_COLUMNS
+
+# One place for the model definition shared by train_model, save_model and the pipeline
+MODEL_PARAMS = {"max_iter": 1000, "random_state": 42}
+
+
+def fit_model(X, y):
+    model = LogisticRegression(**MODEL_PARAMS)
+    model.fit(X, y)
+    return model
+
+# Split off a stratified holdout (test_size=0 -> train on everything, no holdout)
+def split(features, test_size=0.3):
+    X = features[FEATURE_COLUMNS]
+    y = features["default_flag"]
+    if not test_size:
+        return X, None, y, None
+    return train_test_split(X, y, test_size=test_size, random_state=42, stratify=y)
+
+def evaluate_model(model, X_test, y_test):
+    preds_proba = model.predict_proba(X_test)[:, 1]
+    preds = model.predict(X_test)
+    return {
+        "roc_auc": float(roc_auc_score(y_test, preds_proba)) if len(np.unique(y_test)) > 1 else None,
+        "confusion_matrix": confusion_matrix(y_test, preds).tolist(),
+        "classification_report": classification_report(y_test, preds)
+    }
+
+
+# -----------------------------
+# Model artifact
+# -----------------------------
+# models/credit_risk_model.pkl is what the API loads; its content hash is the
+# model version. credit_risk_model.json next to it describes how it was built.
+# Both are written to a temp file and renamed, so the API's file watcher never
+# sees a half-written file.
+def _replace(path, write):
+    tmp = path.with_name(path.name + ".tmp")
+    write(tmp)
+    os.replace(tmp, path)
+
+# background: the feature frame explanations are measured against (the API's
+# /v1/explain uses its column means, like shap.LinearExplainer(model, X)).
+# Metadata is written before the artifact is swapped in, so a loader that sees
+# the new artifact also sees matching metadata.
+def save_artifact(model, metadata=None, path=MODEL_PATH, background=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    joblib.dump(model, tmp)
+    version = artifact_version(tmp.read_bytes())
+    metadata = {
+        "version": version,
+        "trained_at": datetime.now().isoformat(timespec="seconds"),
+        "model_params": MODEL_PARAMS,
+        "feature_columns": FEATURE_COLUMNS,
+        **(metadata or {})
+    }
+    if background is not None:
+        metadata["background_means"] = background[FEATURE_COLUMNS].mean().astype(float).to_dict()
+    # Lets the API load the coefficients without unpickling (or importing sklearn);
+    # non-linear models are unpickled and scored through predict_proba instead
+    if hasattr(model, "coef_"):
+        metadata["scorer"] = scorer_metadata(CompiledScorer.from_model(model), version)
+    save_metadata(metadata, path)
+    os.replace(tmp, path)
+    return load_artifact(path)
+
+def save_metadata(metadata: dict, path=MODEL_PATH):
+    _replace(path.with_suffix(".json"), lambda tmp: tmp.write_text(json.dumps(metadata, indent=2, default=str)))
@@ -0,0 +1,108 @@
+import numpy as np
+import pandas as pd
+
+from src.data_generation.generate_synthetic_data import MERCHANT_CATEGORIES
+from src.storage import read_table, iter_table, table_paths, use_parquet
+
+# Transactions are the largest table; they are streamed in chunks of this many
+# rows and folded into fixed-size per-user arrays, so memory does not grow
+# with the number of transactions.
+CHUNK_SIZE = 2_000_000
+
+# Look-back windows in days, relative to the latest transaction date
+WINDOWS = [30, 90]
+
+COLUMNS = ["card_id", "transaction_date", "amount", "merchant_category", "transaction_type"]
+
+
+# Latest transaction date: Parquet row-group statistics when available,
+# otherwise one pass over the date column
+def latest_transaction_date():
+    if use_parquet("transactions"):
+        import pyarrow.parquet as pq
+        parquet_path, _ = table_paths("transactions")
+        meta = pq.ParquetFile(parquet_path).metadata
+        column = meta.schema.names.index("transaction_date")
+        stats = [meta.row_group(i).column(column).statistics for i in range(meta.num_row_groups)]
+        if stats and all(s is not None and s.has_min_max for s in stats):
+            return np.datetime64(max(pd.Timestamp(s.max) for s in stats), "D")
+    latest = None
+    for chunk in iter_table("transactions", columns=["transaction_date"], batch_size=CHUNK_SIZE):
+        chunk_max = chunk["transaction_date"].max()
+        latest = chunk_max if latest is None or chunk_max > latest else latest
+    return np.datetime64(latest, "D")
+
+
+# -----------------------------
+# Windowed per-user sums
+# -----------------------------
+# Every transaction is reduced to integer codes (user, merchant category,
+# window bucket) and a single flat key, so a chunk is aggregated with one
+# np.bincount per statistic instead of a groupby. Buckets are disjoint
+# (0-29 days, 30-89 days); the nested 30/90-day windows are cumulative sums
+# over buckets at the end.
+class TransactionAggregates:
+
+    def __init__(self, n_users):
+        self.n_users = n_users
+        n_cat = len(MERCHANT_CATEGORIES)
+        self.spend = np.zeros((len(WINDOWS), n_users, n_cat))
+        self.count = np.zeros((len(WINDOWS), n_users), dtype=np.int64)
+        self.online = np.zeros((len(WINDOWS), n_users), dtype=np.int64)
+
+    def update(self, user, bucket, category, amount, online):
+        n_cat = len(MERCHANT_CATEGORIES)
+        size = len(WINDOWS) * self.n_users
+        slot = bucket * self.n_users + user
+        self.spend += np.bincount(slot * n_cat + category, weights=amount, minlength=size * n_cat).reshape(self.spend.shape)
+        self.count += np.bincount(slot, minlength=size).reshape(self.count.shape)
+        self.online += np.bincount(slot[online], minlength=size).reshape(self.online.shape)
+
+    def to_frame(self, users):
+        spend = np.cumsum(self.spend, axis=0)
+        count = np.cumsum(self.count, axis=0)
+        online = np.cumsum(self.online, axis=0)
+        total = spend.sum(axis=2)
+
+        columns = {"user_id": users}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for i, window in enumerate(WINDOWS):
+                columns[f"txn_count_{window}d"] = count[i]
+                columns[f"spend_velocity_{window}d"] = total[i] / window  # average spend per day
+                # Users without transactions in the window get 0 shares / ratio
+                columns[f"online_ratio_{window}d"] = np.where(count[i] > 0, online[i] / count[i], 0.0)
+                for j, category in enumerate(MERCHANT_CATEGORIES):
+                    columns[f"share_{category}_{window}d"] = np.where(total[i] > 0, spend[i, :, j] / total[i], 0.0)
+        return pd.DataFrame(columns)
+
+
+# -----------------------------
+# Transaction feature stage
+# -----------------------------
+# users: pd.Index of user ids defining the output rows (see build_lookups)
+def build_transaction_features(users, as_of=None, chunk_size=CHUNK_SIZE):
+    cards = read_table("credit_cards", columns=["card_id", "user_id"])
+    card_index = pd.Index(cards["card_id"])
+    card_user = users.get_indexer(cards["user_id"])
+    as_of = np.datetime64(as_of, "D") if as_of is not None else latest_transaction_date()
+
+    aggregates = TransactionAggregates(len(users))
+    for chunk in iter_table("transactions", columns=COLUMNS, batch_size=chunk_size, categories=["card_id"]):
+        # Resolve each distinct card once, then broadcast through the category codes
+        card_ids = chunk["card_id"].cat
+        card = card_index.get_indexer(card_ids.categories)[card_ids.codes]
+        card[card_ids.codes < 0] = -1
+        user = np.where(card >= 0, card_user[card], -1)
+        age = (as_of - chunk["transaction_date"].to_numpy().astype("datetime64[D]")).astype(np.int64)
+        bucket = np.searchsorted(WINDOWS, age, side="right")
+        category = pd.Categorical(chunk["merchant_category"], categories=MERCHANT_CATEGORIES).codes
+
+        keep = (user >= 0) & (age >= 0) & (bucket < len(WINDOWS)) & (category >= 0)
+        aggregates.update(
+            user[keep],
+            bucket[keep],
+            category[keep].astype(np.int64),
+            chunk["amount"].to_numpy(dtype=np.float64)[keep],
+            (chunk["transaction_type"] == "online").to_numpy()[keep]
+        )
+    return aggregates.to_frame(users)
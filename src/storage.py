@@ -0,0 +1,204 @@
+import argparse
+import os
+import pandas as pd
+from pathlib import Path
+
+# -----------------------------
+# Paths
+# -----------------------------
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+# CREDIT_RISK_DATA_DIR points the pipeline at another data tree (e.g. benchmarks)
+DATA_DIR = Path(os.getenv("CREDIT_RISK_DATA_DIR", PROJECT_ROOT / "data"))
+DATA_RAW = DATA_DIR / "raw"
+DATA_PROCESSED = DATA_DIR / "processed"
+
+# -----------------------------
+# Table schemas
+# -----------------------------
+# Parquet is the primary on-disk format; CSV is kept as an export (and as a
+# fallback when no Parquet copy exists yet, e.g. a fresh checkout).
+# Low-cardinality text columns are stored as categoricals, dates as dates.
+TABLES = {
+    "users": {
+        "dir": DATA_RAW,
+        "dates": ["account_open_date"],
+        "categories": ["account_status"]
+    },
+    "credit_cards": {
+        "dir": DATA_RAW,
+        "dtypes": {"credit_limit": "int64", "interest_rate": "float64"},
+        "dates": ["card_open_date"],
+        "categories": ["card_status"]
+    },
+    "billing_cycles": {
+        "dir": DATA_RAW,
+        "dtypes": {"total_due": "int64", "minimum_due": "int64"},
+        "dates": ["cycle_start_date", "cycle_end_date", "statement_date", "due_date"]
+    },
+    "transactions": {
+        "dir": DATA_RAW,
+        "dtypes": {"amount": "int64"},
+        "dates": ["transaction_date"],
+        "categories": ["merchant_category", "transaction_type"]
+    },
+    "payments": {
+        "dir": DATA_RAW,
+        "dtypes": {"payment_amount": "int64", "days_late": "int64", "default_flag": "int64"},
+        "dates": ["payment_date"],
+        "categories": ["payment_status"]
+    },
+    "demographics": {
+        "dir": DATA_RAW,
+        "dtypes": {"default_flag": "int64"},
+        "categories": ["age_group", "gender", "income_band"]
+    },
+    "model_features": {
+        "dir": DATA_PROCESSED,
+        "categories": ["income_band", "age_group"]
+    },
+    "credit_scores": {
+        "dir": DATA_PROCESSED,
+        "categories": ["risk_category"]
+    },
+    # Archived raw prediction logs (one Parquet file per day, see src/analysis/log_retention.py)
+    "prediction_logs": {
+        "dir": DATA_DIR / "archive",
+        "categories": ["risk_category", "model_version"]
+    }
+}
+
+
+def table_paths(name: str):
+    base = TABLES[name]["dir"] / name
+    return base.with_suffix(".parquet"), base.with_suffix(".csv")
+
+# Use Parquet unless only the CSV exists or the CSV was edited after it
+def use_parquet(name: str):
+    parquet_path, csv_path = table_paths(name)
+    if not parquet_path.exists():
+        return False
+    return not csv_path.exists() or parquet_path.stat().st_mtime >= csv_path.stat().st_mtime
+
+def _apply_schema(df, name: str):
+    schema = TABLES[name]
+    for col, dtype in schema.get("dtypes", {}).items():
+        if col in df.columns:
+            df[col] = df[col].astype(dtype)
+    for col in schema.get("dates", []):
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col])
+    for col in schema.get("categories", []):
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+def _read_csv(name: str, columns=None, chunksize=None, categories=()):
+    _, csv_path = table_paths(name)
+    schema = TABLES[name]
+    dtypes = {
+        **schema.get("dtypes", {}),
+        **{col: "category" for col in [*schema.get("categories", []), *categories]}
+    }
+    dates = schema.get("dates", [])
+    if columns is not None:
+        dtypes = {col: t for col, t in dtypes.items() if col in columns}
+        dates = [col for col in dates if col in columns]
+    return pd.read_csv(csv_path, usecols=columns, dtype=dtypes, parse_dates=dates, chunksize=chunksize)
+
+
+# -----------------------------
+# Loader API
+# -----------------------------
+# Read a whole table; columns= projects at read time (Parquet skips the rest on disk)
+def read_table(name: str, columns=None):
+    if use_parquet(name):
+        parquet_path, _ = table_paths(name)
+        return pd.read_parquet(parquet_path, columns=columns, memory_map=True)
+    return _read_csv(name, columns)
+
+# Stream a table in batches of roughly batch_size rows. categories= reads extra
+# (e.g. repeated id) columns as categoricals, so lookups run once per distinct value.
+def iter_table(name: str, columns=None, batch_size=1_000_000, categories=()):
+    if use_parquet(name):
+        import pyarrow.parquet as pq
+        parquet_path, _ = table_paths(name)
+        parquet = pq.ParquetFile(parquet_path, memory_map=True, read_dictionary=list(categories) or None)
+        for batch in parquet.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from _read_csv(name, columns, chunksize=batch_size, categories=categories)
+
+# Write Parquet (typed) and, unless csv=False, the CSV export next to it
+def write_table(df, name: str, csv=True):
+    parquet_path, csv_path = table_paths(name)
+    parquet_path.parent.mkdir(parents=True, exist_ok=True)
+    df = _apply_schema(df.copy(), name)
+    if csv:
+        df.to_csv(csv_path, index=False)
+    df.to_parquet(parquet_path, index=False)  # written last so it is never older than the CSV
+    return parquet_path
+
+
+# Append-only writer for tables too large to build as one DataFrame.
+# Each write() adds a Parquet row group (and CSV rows when csv=True).
+# path= redirects the Parquet output (e.g. per-process part files; no CSV).
+#   with TableWriter("transactions") as out:
+#       for chunk in chunks:
+#           out.write(chunk)
+class TableWriter:
+
+    def __init__(self, name: str, csv=True, path=None):
+        self.name = name
+        self.parquet_path, self.csv_path = table_paths(name)
+        if path is not None:
+            self.parquet_path, csv = Path(path), False
+        self.csv = csv
+        self.rows = 0
+        self._parquet = None
+
+    def __enter__(self):
+        self.parquet_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.csv and self.csv_path.exists():
+            self.csv_path.unlink()
+        return self
+
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        df = _apply_schema(df.copy(), self.name)
+        if self.csv:
+            df.to_csv(self.csv_path, mode="a", header=self.rows == 0, index=False)
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self.parquet_path, table.schema)
+        self._parquet.write_table(table.cast(self._parquet.schema))
+        self.rows += len(df)
+
+    def __exit__(self, *exc):
+        if self._parquet is not None:
+            self._parquet.close()
+        return False
+
+# -----------------------------
+# CLI: python -m src.storage convert|export [table ...]
+# -----------------------------
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert CSV tables to Parquet, or re-export Parquet tables as CSV")
+    parser.add_argument("command", choices=["convert", "export"])
+    parser.add_argument("tables", nargs="*", metavar="table", help=f"tables to process (default: all of {', '.join(TABLES)})")
+    args = parser.parse_args()
+    # Checked by hand: argparse rejects an empty nargs="*" positional that has choices
+    unknown = [name for name in args.tables if name not in TABLES]
+    if unknown:
+        parser.error(f"unknown table(s): {', '.join(unknown)} (choose from {', '.join(TABLES)})")
+
+    command = args.command
+    for name in args.tables or list(TABLES):
+        parquet_path, csv_path = table_paths(name)
+        if command == "convert" and csv_path.exists():
+            write_table(_read_csv(name), name, csv=False)
+            print(f"✅ {csv_path.name} -> {parquet_path.name}")
+        elif command == "export" and parquet_path.exists():
+            pd.read_parquet(parquet_path).to_csv(csv_path, index=False)
+            os.utime(parquet_path)  # keep Parquet the preferred copy
+            print(f"✅ {parquet_path.name} -> {csv_path.name}")